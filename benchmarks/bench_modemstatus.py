@@ -0,0 +1,62 @@
+# benchmarks/bench_modemstatus.py
+"""Micro-benchmark of the modem status parser against synthetic status pages.
+
+Run from the project root:
+
+    python -m benchmarks.bench_modemstatus
+"""
+import random
+import timeit
+
+from laboot.modemstatus import find_linked_serial_numbers, link_pattern, serial_pattern
+
+SENSORS_PER_SET = 6
+
+
+def make_page(modems: int, linked_ratio: float = 0.5, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["<html><body><pre>", "Serial   Peer 1   Peer 2   RSSI", "-" * 40]
+    for serial_number in range(9800000, 9800000 + modems):
+        if rng.random() < linked_ratio:
+            lines.append(f"  {serial_number}  {rng.randint(1000000, 9999999)}  "
+                         f"{rng.randint(1000000, 9999999)}  {rng.randint(-90, -40)}")
+        else:
+            lines.append(f"  {serial_number}  ---  ---  ---")
+    lines.append("</pre></body></html>")
+
+    return '\n'.join(lines)
+
+
+def legacy_find_link(page: str, serial_number: str) -> bool:
+    """The original per sensor scan, kept for comparison."""
+    for line in [line for line in page.split('\n') if serial_pattern.match(line)]:
+        if (match := link_pattern.match(line)) and match[0].split()[0] == serial_number:
+            return True
+
+    return False
+
+
+def main():
+    print(f"{'modems':>8} {'legacy (ms)':>12} {'indexed (ms)':>13} {'streamed (ms)':>14} {'speed up':>9}")
+
+    for modems in (50, 200, 500, 1000, 5000):
+        page = make_page(modems)
+        # the set under test sits in the middle of the page
+        first = 9800000 + modems // 2
+        serial_numbers = [str(serial_number) for serial_number in range(first, first + SENSORS_PER_SET)]
+        lines = page.split('\n')
+
+        runs = max(10, 20000 // modems)
+        legacy = timeit.timeit(lambda: [legacy_find_link(page, s) for s in serial_numbers], number=runs)
+        indexed = timeit.timeit(lambda: find_linked_serial_numbers(page, serial_numbers), number=runs)
+        streamed = timeit.timeit(lambda: find_linked_serial_numbers(iter(lines), serial_numbers), number=runs)
+
+        assert {s for s in serial_numbers if legacy_find_link(page, s)} == \
+            find_linked_serial_numbers(page, serial_numbers)
+
+        print(f"{modems:>8} {legacy / runs * 1000:>12.3f} {indexed / runs * 1000:>13.3f} "
+              f"{streamed / runs * 1000:>14.3f} {legacy / streamed:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
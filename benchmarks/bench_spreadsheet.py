@@ -0,0 +1,97 @@
+# benchmarks/bench_spreadsheet.py
+"""Compares the read-only import path with the original full workbook load.
+
+Run from the project root:
+
+    python -m benchmarks.bench_spreadsheet [--rows 5000] [--sheets 2]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from openpyxl import Workbook, load_workbook
+
+from laboot import constants
+from laboot.spreadsheet import _read_cells
+
+WORKSHEET = "Sensor(s)"
+SERIAL_LOCATIONS = "D4 E4 F4 G4 H4 I4".split()
+PASS_RESULTS = (constants.REPORTING_RESULTS, constants.RAW_CONFIG_RESULTS, constants.HIGH_VOLTAGE_RESULTS,
+                constants.LOW_VOLTAGE_RESULTS, constants.CALIBRATIONS_RESULTS, constants.PERSISTENCE_RESULTS,
+                constants.FAULT_CURRENT_RESULTS)
+
+
+def make_workbook(path: str, rows: int, sheets: int, first_serial_number: int = 9800001):
+    work_book = Workbook()
+    work_sheet = work_book.active
+    work_sheet.title = WORKSHEET
+
+    for index, cell in enumerate(SERIAL_LOCATIONS):
+        work_sheet[cell] = first_serial_number + index
+    for results in PASS_RESULTS:
+        for cell in results:
+            work_sheet[cell] = "Pass"
+    for cell in constants.RSSI_RESULTS:
+        work_sheet[cell] = -60
+    for cell in constants.TEMPERATURE_RESULTS:
+        work_sheet[cell] = 21.5
+    work_sheet[constants.TEMPERATURE_REFERENCE] = 22.0
+
+    # calibration history and raw data the import never looks at
+    for row in range(50, 50 + rows):
+        work_sheet.append([row * column for column in range(1, 31)])
+    for index in range(sheets):
+        extra = work_book.create_sheet(f"Raw Data {index}")
+        for row in range(1, rows + 1):
+            extra.append([f"r{row}c{column}" for column in range(1, 31)])
+
+    work_book.save(path)
+
+
+def legacy_read(path: str, cells):
+    work_book = load_workbook(filename=path, read_only=False, keep_vba=True, data_only=True)
+    work_sheet = work_book[WORKSHEET]
+    values = {cell: work_sheet[cell].value for cell in cells}
+    work_book.close()
+    return values
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--sheets", type=int, default=2)
+    args = parser.parse_args()
+
+    cells = SERIAL_LOCATIONS + [constants.TEMPERATURE_REFERENCE] + \
+        [cell for results in constants.ALL_RESULTS for cell in results]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "traveller.xlsx")
+        make_workbook(path, args.rows, args.sheets)
+        print(f"workbook: {os.path.getsize(path) / 1024:.0f} KiB, {args.rows} rows x {args.sheets + 1} sheets")
+
+        legacy, legacy_time, legacy_peak = measure(legacy_read, path, cells)
+        streamed, streamed_time, streamed_peak = measure(_read_cells, path, WORKSHEET, cells)
+
+    assert {cell: str(value) for cell, value in legacy.items()} == \
+           {cell: str(value) for cell, value in streamed().items()}
+
+    print(f"{'path':<12} {'time (s)':>9} {'peak (MiB)':>11}")
+    print(f"{'full load':<12} {legacy_time:>9.3f} {legacy_peak / 2 ** 20:>11.1f}")
+    print(f"{'read-only':<12} {streamed_time:>9.3f} {streamed_peak / 2 ** 20:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# benchmarks/bench_station.py
+"""End-to-end benchmark of the station: import, configure, test and save whole sets.
+
+Every collector is a local CollectorSimulator and the 5 Amp tests run on a clock
+compressed by --speed, so a 25 minute test takes seconds. Import, configuration
+and save are real work and are timed in real seconds. Test times are reported in
+simulated seconds. Results are saved in the background as the app does, idle is
+the real time a collector waits between finishing a set and starting on the next.
+
+Run from the project root:
+
+    python -m benchmarks.bench_station [--sets 12] [--collectors 2] [--speed 200]
+    python -m benchmarks.bench_station --save-baseline benchmarks/station_baseline.json
+    python -m benchmarks.bench_station --baseline benchmarks/station_baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List
+
+from PyQt5.QtCore import QSettings
+
+from benchmarks.bench_spreadsheet import make_workbook
+from laboot import spreadsheet
+from laboot.collectorsim import CollectorSimulator, SimulatorSettings
+from laboot.config.app import settings as lab_settings
+from laboot.config.collector.registry import Collector, CollectorRegistry
+from laboot.linkpolicy import LinkHistory
+from laboot.linkcapture import LinkRecorder
+from laboot.orchestrator import ResultWriter, StationEvent, StationOrchestrator, StationSet, make_find_linked
+from laboot.scheduler import CompressedClock
+from laboot.setqueue import make_station_set
+
+STAGES = ("import", "configure", "test", "idle", "save")
+PASSWORD = "bench"
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if len(samples) == 1:
+        return {"p50": samples[0], "p90": samples[0], "p99": samples[0]}
+
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p90": cuts[89], "p99": cuts[98]}
+
+
+class StationRun:
+    """Records when each set enters and leaves each stage."""
+
+    def __init__(self, clock: CompressedClock):
+        self.clock = clock
+        self.samples = defaultdict(list)
+        self.errors = []
+        self.finished = threading.Event()
+        self.expected = 0
+        self.writer = ResultWriter(self._save, on_saved=self._on_saved)
+
+        self._started = {}
+        # collector name -> when it finished its last set
+        self._idle_since = {}
+        self._lock = threading.Lock()
+
+    def on_event(self, event: StationEvent):
+        key = event.station_set.name
+        if event.kind == "configuring":
+            self._started[key] = time.perf_counter()
+            if (idle_since := self._idle_since.get(event.collector.name)) is not None:
+                self._record("idle", self._started[key] - idle_since)
+        elif event.kind == "configured":
+            self._record("configure", time.perf_counter() - self._started[key])
+            self._started[key] = self.clock()
+        elif event.kind == "finished":
+            self._record("test", self.clock() - self._started[key])
+            self._idle_since[event.collector.name] = time.perf_counter()
+            self.writer.submit(event.station_set)
+        elif event.kind == "error":
+            with self._lock:
+                self.errors.append(f"{key}: {event.payload}")
+            self._done()
+
+    def _save(self, station_set: StationSet):
+        started = time.perf_counter()
+        result = spreadsheet.save_test_results(station_set.source, station_set.sensors.get_test_results())
+        self._record("save", time.perf_counter() - started)
+        return result
+
+    def _on_saved(self, station_set: StationSet, result):
+        if not result:
+            with self._lock:
+                self.errors.append(f"{station_set.name}: {result.message}")
+        self._done()
+
+    def _record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def _done(self):
+        with self._lock:
+            self.expected -= 1
+            if self.expected == 0:
+                self.finished.set()
+
+
+def run(args) -> dict:
+    clock = CompressedClock(args.speed)
+    simulator_settings = SimulatorSettings(latency=args.latency, error_rate=args.error_rate, modems=args.modems,
+                                           link_time=args.link_time, link_spread=args.link_spread,
+                                           never_link_rate=args.never_link_rate, password=PASSWORD)
+    simulators = [CollectorSimulator(simulator_settings._replace(seed=index), clock=clock).start()
+                  for index in range(args.collectors)]
+    registry = CollectorRegistry([Collector(f"sim{index}", simulator.config_url, simulator.status_url, PASSWORD)
+                                  for index, simulator in enumerate(simulators)])
+
+    station = StationRun(clock)
+    station.expected = args.sets
+
+    with tempfile.TemporaryDirectory() as directory:
+        # polls are recorded as they are at a station, into an archive that goes with the workbooks
+        recorder = LinkRecorder(os.path.join(directory, "bench.links"))
+        orchestrator = StationOrchestrator(registry, find_linked=make_find_linked(recorder), on_event=station.on_event,
+                                           clock=clock, link_history=LinkHistory())
+
+        paths = []
+        for index in range(args.sets):
+            paths.append(os.path.join(directory, f"set_{index:03d}.xlsx"))
+            make_workbook(paths[-1], args.rows, 0, first_serial_number=9800001 + index * 10)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        station.writer.start()
+        orchestrator.start()
+
+        # sets are imported and handed over one by one, as an operator dropping spreadsheets would
+        for path in paths:
+            import_started = time.perf_counter()
+            result = spreadsheet.get_serial_numbers(path)
+            station.samples["import"].append(time.perf_counter() - import_started)
+            orchestrator.submit(make_station_set(path, result()))
+
+        orchestrator.close()
+        station.finished.wait()
+        orchestrator.wait()
+        station.writer.close()
+        recorder.close()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    for simulator in simulators:
+        simulator.stop()
+
+    # each collector works through its sets one after the other, tests in simulated time, imports and
+    # saves overlap with testing
+    real_stages = sum(sum(station.samples[stage]) for stage in ("configure", "idle"))
+    cycle_time = (real_stages + sum(station.samples["test"])) / args.collectors
+    return {
+        "settings": {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline")},
+        "stages": {stage: percentiles(station.samples[stage]) for stage in STAGES if station.samples[stage]},
+        "sets_per_hour": args.sets * 3600 / cycle_time if cycle_time else 0.0,
+        "peak_memory_mib": peak / 2 ** 20,
+        "wall_time": elapsed,
+        "requests": sum(simulator.requests for simulator in simulators),
+        "errors": station.errors,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Lists everything that got worse than the baseline by more than 'tolerance'."""
+    regressions = []
+    for stage, cuts in baseline["stages"].items():
+        for cut in ("p50", "p90"):
+            if (now := report["stages"].get(stage, {}).get(cut)) is not None and now > cuts[cut] * (1 + tolerance):
+                regressions.append(f"{stage} {cut}: {now:.3f} s, baseline {cuts[cut]:.3f} s")
+
+    if report["sets_per_hour"] < baseline["sets_per_hour"] * (1 - tolerance):
+        regressions.append(f"sets/hour: {report['sets_per_hour']:.1f}, baseline {baseline['sets_per_hour']:.1f}")
+    if report["peak_memory_mib"] > baseline["peak_memory_mib"] * (1 + tolerance):
+        regressions.append(f"peak memory: {report['peak_memory_mib']:.1f} MiB, "
+                           f"baseline {baseline['peak_memory_mib']:.1f} MiB")
+
+    return regressions
+
+
+def print_report(report: dict):
+    print(f"{'stage':<10} {'p50':>9} {'p90':>9} {'p99':>9}")
+    for stage, cuts in report["stages"].items():
+        unit = "sim s" if stage == "test" else "s"
+        print(f"{stage:<10} {cuts['p50']:>9.3f} {cuts['p90']:>9.3f} {cuts['p99']:>9.3f}  {unit}")
+
+    print(f"sets/hour: {report['sets_per_hour']:.1f}")
+    print(f"peak memory: {report['peak_memory_mib']:.1f} MiB")
+    print(f"wall time: {report['wall_time']:.1f} s, collector requests: {report['requests']}")
+    for error in report["errors"]:
+        print(f"error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sets", type=int, default=12)
+    parser.add_argument("--collectors", type=int, default=2)
+    parser.add_argument("--speed", type=float, default=200, help="how much faster than real time tests run")
+    parser.add_argument("--rows", type=int, default=500, help="rows of unrelated data in each workbook")
+    parser.add_argument("--latency", type=float, default=0.005, help="collector response time, real seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--modems", type=int, default=100)
+    parser.add_argument("--link-time", type=float, default=300.0)
+    parser.add_argument("--link-spread", type=float, default=60.0)
+    parser.add_argument("--never-link-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", help="compare against this baseline, exit with 1 on a regression")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slow down before a regression")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        lab_settings.load_from_config_file(r"laboot/resources/data/config.txt", QSettings())
+
+    report = run(args)
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as out_f:
+            json.dump(report, out_f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as in_f:
+            regressions = compare(report, json.load(in_f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,14 @@
+import multiprocessing
 import sys
 
-from laboot.__main__ import main
-
 if __name__ == '__main__':
+    # batch import runs in worker processes, needed by the frozen executable
+    multiprocessing.freeze_support()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        # headless, the GUI modules are never imported
+        from laboot import headless
+        sys.exit(headless.main(sys.argv[2:]))
+
+    from laboot.__main__ import main
     main(sys.argv)
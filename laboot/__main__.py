@@ -1,22 +1,44 @@
 import sys
 
-from PyQt5.QtCore import QSettings
-from PyQt5.QtWidgets import QApplication
+# the probe starts before Qt, settings and logging are imported, they take most of the import time
+from laboot import startup
 
-from laboot.config.app import logging as lab_logging
-from laboot.config.app import settings as lab_settings
+if "PROFILE_STARTUP" in sys.argv:
+    startup.get_probe().time_imports()
 
-lab_settings.load_from_config_file(r"laboot/resources/data/config.txt", QSettings())
-lab_settings.load_from_command_line(sys.argv, QSettings())
-lab_logging.initialize()
+from PyQt5.QtCore import QSettings, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from laboot import metrics  # noqa: E402
+from laboot.config.app import logging as lab_logging  # noqa: E402
+from laboot.config.app import settings as lab_settings  # noqa: E402
 
 
 def main(args):
+    probe = startup.get_probe()
+    probe.mark("import Qt and settings")
+
+    # done here rather than at import so batch import worker processes don't repeat it
+    lab_settings.load_from_config_file(r"laboot/resources/data/config.txt", QSettings())
+    lab_settings.load_from_command_line(args, QSettings())
+    lab_logging.initialize()
+    metrics.configure(lab_settings.get_settings())
+    probe.mark("settings and logging")
+
     app = QApplication(args)
+    probe.mark("QApplication")
 
     from laboot.mainwindow import MainWindow
+    probe.mark("import main window")
     # noinspection PyUnusedLocal
     window = MainWindow()
+    probe.mark("create main window")
+
+    def started():
+        probe.mark("first events")
+        probe.log()
+
+    QTimer.singleShot(0, started)
     sys.exit(app.exec_())
 
 
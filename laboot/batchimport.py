@@ -0,0 +1,77 @@
+# batchimport.py
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, List
+
+from laboot import spreadsheet
+from laboot.config.app import settings as lab_settings
+from laboot.utilities.returns import Result
+
+SPREADSHEET_EXTENSIONS = (".xlsx", ".xlsm")
+
+ImportedFile = namedtuple("ImportedFile", "index path result")
+
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """Returns the spreadsheets in 'paths', folders are replaced by the spreadsheets they contain."""
+    spreadsheets = []
+    for path in paths:
+        if os.path.isdir(path):
+            spreadsheets.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                                if _is_spreadsheet(name) and os.path.isfile(os.path.join(path, name)))
+        elif _is_spreadsheet(path):
+            spreadsheets.append(path)
+
+    return spreadsheets
+
+
+def import_all(paths: List[str], on_imported: Callable[[ImportedFile], None] = None,
+               max_workers: int = None) -> List[ImportedFile]:
+    """Reads the serial numbers of every spreadsheet in 'paths' in parallel worker processes.
+
+    The workers only read the cells, prior failures are identified here as each file
+    comes back and 'on_imported' is called straight away, in the order files finish,
+    so a set can be tested while the rest are still being read. A file that can't be
+    read gets a failed Result with the reason, it never stops the batch.
+
+    Workers are spawned, not forked: the GUI imports from a background thread of a
+    running QApplication, and a forked child would also inherit the queue logging
+    handler without the thread that writes its records out. Spawned workers are handed
+    this process's settings.
+
+    Returns
+    -------
+        list
+            an ImportedFile for each path, in the order of 'paths'
+    """
+    if not paths:
+        return []
+
+    imported: List[ImportedFile] = [None] * len(paths)
+    with ProcessPoolExecutor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1),
+                             mp_context=multiprocessing.get_context("spawn"), initializer=lab_settings.adopt,
+                             initargs=(dict(lab_settings.get_settings().values),)) as pool:
+        futures = {pool.submit(spreadsheet.get_set_cells, path): index for index, path in enumerate(paths)}
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                if result := future.result():
+                    # rules hold per workbook, identifying one file needs nothing from the others
+                    result = Result(True, spreadsheet.identify_sets([result()])[0])
+            except Exception as e:
+                result = Result(False, None, message=f"Unable to import the spreadsheet: {e}", exception=e)
+
+            imported[index] = ImportedFile(index, paths[index], result)
+            if on_imported:
+                on_imported(imported[index])
+
+    return imported
+
+
+def _is_spreadsheet(path: str) -> bool:
+    # '~$' files are the lock files Excel leaves next to open workbooks
+    name = os.path.basename(path)
+    return name.lower().endswith(SPREADSHEET_EXTENSIONS) and not name.startswith("~$")
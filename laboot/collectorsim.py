@@ -0,0 +1,294 @@
+# collectorsim.py
+"""A stand-in for the collector's web server, for timing the station without a bench.
+
+It serves the configuration form, with the field names the configurators look
+for, and a modem status page. A serial number saved through the form links
+after its link up time, counted from the moment it was saved.
+
+Run it from the project root:
+
+    python -m laboot.collectorsim --port 8080 --latency 0.05 --error-rate 0.02
+
+and point the app at it in config.txt:
+
+    collectors/names=sim
+    collectors/sim/config_url=http://127.0.0.1:8080/configuration.html
+    collectors/sim/status_url=http://127.0.0.1:8080/modemstatus.html
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from laboot.config.dom.constants import (serial_number_elements, correction_angle_elements, password_element,
+                                         frequency, save_config_element, voltage_ride_through)
+
+CONFIGURATION_PATH = "/configuration.html"
+MODEM_STATUS_PATH = "/modemstatus.html"
+
+# link_times maps serial number -> seconds to link, or None for never, and overrides the spread
+SimulatorSettings = namedtuple(
+    "SimulatorSettings",
+    "latency error_rate modems link_time link_spread never_link_rate link_times password seed",
+    defaults=(0.0, 0.0, 100, 300.0, 60.0, 0.0, None, None, None)
+)
+
+
+class CollectorSimulator:
+    """Serves a simulated collector on a background thread.
+
+    Parameters
+    ----------
+    settings: SimulatorSettings
+        latency (seconds added to every response), error_rate (fraction of requests
+        answered with 503), modems (other modems on the status page), link times and,
+        when set, the password the form must be submitted with
+
+    clock: Callable
+        the clock link up times are measured on, benchmarks pass a compressed one
+    """
+
+    def __init__(self, settings: SimulatorSettings = SimulatorSettings(), host: str = "127.0.0.1", port: int = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings
+        self.clock = clock
+
+        self.requests = 0
+        self.errors = 0
+        self.configurations = 0
+
+        self._random = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self._form = {name: "0" for name in serial_number_elements}
+        self._form.update({name: "0.0" for name in correction_angle_elements})
+        self._form[frequency] = "50"
+        self._form[voltage_ride_through] = "on"
+        # serial number -> clock time it links, None if it never does
+        self._links_at: Dict[str, Optional[float]] = {}
+        self._background = self._make_background_modems()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def config_url(self) -> str:
+        return self.url + CONFIGURATION_PATH
+
+    @property
+    def status_url(self) -> str:
+        return self.url + MODEM_STATUS_PATH
+
+    def start(self) -> "CollectorSimulator":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="collectorsim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def configured_serial_numbers(self) -> tuple:
+        with self._lock:
+            return tuple(self._form[name] for name in serial_number_elements)
+
+    def configuration_page(self) -> str:
+        with self._lock:
+            form = dict(self._form)
+
+        def text_input(name):
+            return f'<tr><td>{name}</td><td><input type="text" name="{name}" value="{form[name]}"></td></tr>'
+
+        def checked(condition):
+            return " checked" if condition else ""
+
+        return "\n".join([
+            "<html><head><title>Collector Configuration</title></head><body>",
+            f'<form action="{CONFIGURATION_PATH}" method="post"><table>',
+            *[text_input(name) for name in serial_number_elements],
+            *[text_input(name) for name in correction_angle_elements],
+            f'<tr><td>Frequency</td><td>'
+            f'<input type="radio" name="{frequency}" value="50"{checked(form[frequency] == "50")}>50 Hz'
+            f'<input type="radio" name="{frequency}" value="60"{checked(form[frequency] == "60")}>60 Hz</td></tr>',
+            f'<tr><td>Voltage Ride Through</td><td><input type="checkbox" name="{voltage_ride_through}" '
+            f'id="{voltage_ride_through}"{checked(form[voltage_ride_through] == "on")}></td></tr>',
+            f'<tr><td>Password</td><td><input type="password" name="{password_element}"></td></tr>',
+            f'</table><input type="submit" id="{save_config_element}" name="{save_config_element}" value="Save">',
+            "</form></body></html>",
+        ])
+
+    def modem_status_page(self) -> str:
+        now = self.clock()
+        with self._lock:
+            configured = [(serial_number, links_at) for serial_number, links_at in self._links_at.items()]
+
+        lines = ["<html><body><pre>", "Serial   Peer 1   Peer 2   RSSI", "-" * 40]
+        for serial_number, links_at in configured:
+            if links_at is not None and now >= links_at:
+                lines.append(self._linked_line(serial_number))
+            else:
+                lines.append(f"  {serial_number}  ---  ---  ---")
+        lines.extend(self._background)
+        lines.append("</pre></body></html>")
+
+        return "\n".join(lines)
+
+    def save_configuration(self, data: Dict[str, str]) -> bool:
+        if self.settings.password is not None and data.get(password_element) != self.settings.password:
+            return False
+
+        now = self.clock()
+        with self._lock:
+            for name in serial_number_elements + correction_angle_elements + (frequency,):
+                if name in data:
+                    self._form[name] = data[name]
+            # an unchecked checkbox isn't submitted at all
+            self._form[voltage_ride_through] = "on" if voltage_ride_through in data else ""
+
+            self._links_at = {serial_number: self._link_up_time(serial_number, now)
+                              for serial_number in (self._form[name] for name in serial_number_elements)
+                              if serial_number.isdigit() and len(serial_number) == 7}
+            self.configurations += 1
+
+        return True
+
+    def _link_up_time(self, serial_number: str, now: float) -> Optional[float]:
+        link_times = self.settings.link_times or {}
+        if serial_number in link_times:
+            seconds = link_times[serial_number]
+        elif self._random.random() < self.settings.never_link_rate:
+            seconds = None
+        else:
+            seconds = max(0.0, self._random.gauss(self.settings.link_time, self.settings.link_spread))
+
+        return None if seconds is None else now + seconds
+
+    def _linked_line(self, serial_number: str) -> str:
+        # peers and signal strength only have to be stable for as long as the modem stays linked
+        seed = int(serial_number)
+        return f"  {serial_number}  {(seed * 7) % 9000000 + 1000000}  {(seed * 13) % 9000000 + 1000000}  " \
+               f"{-40 - seed % 50}"
+
+    def _make_background_modems(self) -> list:
+        lines = []
+        for serial_number in range(9000000, 9000000 + self.settings.modems):
+            if self._random.random() < 0.5:
+                lines.append(self._linked_line(str(serial_number)))
+            else:
+                lines.append(f"  {serial_number}  ---  ---  ---")
+
+        return lines
+
+    def _make_handler(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path == CONFIGURATION_PATH:
+                    self._respond(simulator.configuration_page)
+                elif path == MODEM_STATUS_PATH:
+                    self._respond(simulator.modem_status_page)
+                else:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+
+            def do_POST(self):
+                if urlsplit(self.path).path != CONFIGURATION_PATH:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+                if not self._simulate_network():
+                    return
+
+                if not simulator.save_configuration(dict(parse_qsl(body, keep_blank_values=True))):
+                    self.send_error(HTTPStatus.FORBIDDEN, "Wrong password")
+                    return
+
+                self._send(simulator.configuration_page())
+
+            def log_message(self, format_string, *args):
+                simulator.logger.debug(format_string % args)
+
+            def _respond(self, page: Callable[[], str]):
+                if self._simulate_network():
+                    self._send(page())
+
+            def _simulate_network(self) -> bool:
+                with simulator._lock:
+                    simulator.requests += 1
+                    failed = simulator._random.random() < simulator.settings.error_rate
+                    if failed:
+                        simulator.errors += 1
+
+                if simulator.settings.latency:
+                    time.sleep(simulator.settings.latency)
+                if failed:
+                    self.send_error(HTTPStatus.SERVICE_UNAVAILABLE)
+
+                return not failed
+
+            def _send(self, text: str):
+                body = text.encode("utf-8")
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _parse_link_times(values) -> Dict[str, Optional[float]]:
+    link_times = {}
+    for value in values or []:
+        serial_number, _, seconds = value.partition("=")
+        link_times[serial_number] = None if seconds.lower() == "never" else float(seconds)
+
+    return link_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulates a collector's configuration and modem status pages.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--modems", type=int, default=100, help="other modems listed on the status page")
+    parser.add_argument("--link-time", type=float, default=300.0, help="mean seconds for a sensor to link")
+    parser.add_argument("--link-spread", type=float, default=60.0, help="standard deviation of the link time")
+    parser.add_argument("--never-link-rate", type=float, default=0.0, help="fraction of sensors that never link")
+    parser.add_argument("--link", action="append", metavar="SERIAL=SECONDS",
+                        help="link time of one serial number, 'never' if it shouldn't link, may be repeated")
+    parser.add_argument("--password", default=None, help="password the form must be saved with")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = SimulatorSettings(args.latency, args.error_rate, args.modems, args.link_time, args.link_spread,
+                                 args.never_link_rate, _parse_link_times(args.link), args.password, args.seed)
+    simulator = CollectorSimulator(settings, args.host, args.port).start()
+    print(f"configuration: {simulator.config_url}")
+    print(f"modem status:  {simulator.status_url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
 # logging.py
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+from typing import Iterable, Optional
 
-from PyQt5.QtCore import QSettings
+from laboot.config.app.settings import get_settings
+
+# loggers whose records are dropped, along with their children
+EXCLUDED_LOGGERS = ("selenium", "urllib3", "test log")
+
+TEXT_FORMAT = "%(asctime)s : %(name)s : %(levelname)s : %(module)s.%(funcName)s(), Line %(lineno)d - %(message)s"
+DATE_FORMAT = "%d-%b-%y %H:%M:%S"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
 
 
 def _get_logging_level_constant(level: str):
@@ -14,26 +29,112 @@ def _get_logging_level_constant(level: str):
     return level_constants.get(level, logging.DEBUG)
 
 
+class ExcludeLoggers(logging.Filter):
+    """Drops records of the 'excluded' loggers and their children.
+
+    The answer for each logger name is worked out once, there are only as many
+    names as there are modules logging.
+    """
+
+    def __init__(self, excluded: Iterable[str]):
+        super().__init__()
+        self.excluded = tuple(excluded)
+        self._children = tuple(name + "." for name in self.excluded)
+        self._allowed = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (allowed := self._allowed.get(record.name)) is None:
+            allowed = self._allowed[record.name] = not (record.name in self.excluded
+                                                        or record.name.startswith(self._children))
+        return allowed
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, 'elapsed' is seconds since the application started."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "elapsed": round(record.relativeCreated / 1000, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": f"{record.module}.{record.funcName}",
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the message is merged now, while its arguments still hold what was logged, and
+        # formatting is left to the listener's handlers, exception included
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _make_file_handler(settings) -> logging.Handler:
+    """Appends to the log, rotated by size, or at an interval when 'log/rotate_when' is set."""
+    file_name = settings.value("log/file", "app.log")
+    backup_count = int(settings.value("log/backup_count", 5))
+
+    if when := settings.value("log/rotate_when"):
+        return logging.handlers.TimedRotatingFileHandler(file_name, when=when, backupCount=backup_count,
+                                                         encoding="utf-8", delay=True)
+
+    return logging.handlers.RotatingFileHandler(file_name, maxBytes=int(settings.value("log/max_bytes", 2 ** 20)),
+                                                backupCount=backup_count, encoding="utf-8", delay=True)
+
+
 def initialize():
-    settings = QSettings()
+    """Logs to the console and a rotating file from a background thread.
+
+    Loggers only put records on a queue, so nothing logging waits on the disk or
+    the console, the GUI thread included.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    settings = get_settings()
 
     console_handler = logging.StreamHandler()  # defaults to sys.stderr
-    console_handler.addFilter(lambda r: False if "selenium" in r.name else True)
-    console_handler.addFilter(lambda r: False if "urllib3" in r.name else True)
-    console_handler.addFilter(lambda r: False if "test log" in r.name else True)
-
-    file_handler = logging.FileHandler('app.log', mode='w')
-    file_handler.addFilter(lambda r: False if "selenium" in r.name else True)
-    file_handler.addFilter(lambda r: False if "urllib3" in r.name else True)
-    file_handler.addFilter(lambda r: False if "test log" in r.name else True)
-
-    logging.basicConfig(level=_get_logging_level_constant(settings.value("main/debug_level")),
-                        format="%(asctime)s : " +
-                               "%(name)s : " +
-                               "%(levelname)s : " +
-                               "%(module)s." +
-                               "%(funcName)s(), " +
-                               "Line %(lineno)d - " +
-                               "%(message)s",
-                        datefmt="%d-%b-%y %H:%M:%S",
-                        handlers=[console_handler, file_handler])
+    console_handler.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+
+    file_handler = _make_file_handler(settings)
+    if settings.value("log/format", "text") == "json":
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(log_queue)
+    # filtered before it is queued, a dropped record costs one dictionary lookup
+    _queue_handler.addFilter(ExcludeLoggers(EXCLUDED_LOGGERS))
+
+    root = logging.getLogger()
+    root.setLevel(_get_logging_level_constant(settings.debug_level))
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Writes out whatever is still queued, then closes the handlers."""
+    global _listener
+    if _listener is None:
+        return
+
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
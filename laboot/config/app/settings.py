@@ -1,7 +1,13 @@
 # settings.py
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from typing import Dict, Optional
 
 from PyQt5.QtCore import QSettings, QCoreApplication
 
+from laboot.signals import SettingsSignals
+
 
 org_name = "Medium Voltage Sensors"
 app_name = "laboot"
@@ -10,16 +16,149 @@ QCoreApplication.setOrganizationName(org_name)
 QCoreApplication.setApplicationName(app_name)
 
 
-def load_from_config_file(config_file: str, settings_repo: QSettings):
+class Settings(namedtuple("Settings", "values debug debug_level journal request_timeout config_password admin_user "
+                                      "admin_password chromedriver worksheet serial_locations result_locations "
+                                      "failure_rules headless auto_configure_collector successive_testing")):
+    """The application settings parsed once, never changed in place.
+
+    Settings are replaced as a whole when any of them changes, so whoever holds on
+    to one sees a consistent set. The typed fields cover what the app reads often,
+    'value' looks up any other setting by its key.
+    """
+
+    __slots__ = ()
+
+    def value(self, key: str, default=None):
+        return self.values.get(key, default)
+
+
+def _to_bool(value) -> bool:
+    return str(value).lower() == "true"
+
+
+def _to_text(value) -> str:
+    # what QSettings gives back for a value, so values read and values being set compare equal
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def parse(values: Dict[str, str]) -> Settings:
+    def split(key):
+        return tuple((values.get(key) or "").split())
+
+    return Settings(
+        values=MappingProxyType(dict(values)),
+        debug=_to_bool(values.get("DEBUG")),
+        debug_level=values.get("main/debug_level", "debug"),
+        journal=values.get("main/journal", "session.journal"),
+        request_timeout=float(values["main/request_timeout"]) if values.get("main/request_timeout") else None,
+        config_password=values.get("main/config_password"),
+        admin_user=values.get("main/admin_user"),
+        admin_password=values.get("main/admin_password"),
+        chromedriver=values.get("drivers/chromedriver"),
+        worksheet=values.get("spreadsheet/worksheet"),
+        serial_locations=split("spreadsheet/serial_locations"),
+        result_locations=split("spreadsheet/result_locations"),
+        failure_rules=values.get("spreadsheet/failure_rules", "laboot/resources/data/failure_rules.json"),
+        headless=_to_bool(values.get("ui/menus/options/headless", "True")),
+        auto_configure_collector=_to_bool(values.get("ui/menus/options/autoconfigcollector", "False")),
+        successive_testing=_to_bool(values.get("ui/menus/options/successivetesting", "False")),
+    )
+
+
+signals = SettingsSignals()
+
+_settings: Optional[Settings] = None
+_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """The current settings, read from the persistent settings the first time."""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = parse(_read_all(QSettings()))
+
+    return _settings
+
+
+def set_values(values: Dict[str, object], settings_repo: QSettings = None, quiet: bool = True) -> Settings:
+    """Changes settings, only values that differ from the current ones are written.
+
+    Emits 'signals.changed' with the new settings and the keys that changed, when any did.
+    """
+    global _settings
+    settings_repo = settings_repo if settings_repo is not None else QSettings()
+    current = get_settings()
+
+    with _lock:
+        changed = {key: _to_text(value) for key, value in values.items()
+                   if _to_text(value) != current.values.get(key)}
+        if not changed:
+            return current
+
+        for key, value in changed.items():
+            if not quiet:
+                print(f"updating setting: {key}={value}")
+            settings_repo.setValue(key, value)
+
+        _settings = parse({**current.values, **changed})
+        settings = _settings
+
+    signals.changed.emit(settings, tuple(changed))
+    return settings
+
+
+def set_value(key: str, value, settings_repo: QSettings = None) -> Settings:
+    return set_values({key: value}, settings_repo)
+
+
+def adopt(values: Dict[str, str]):
+    """Uses 'values' as the settings of this process, nothing is read or written.
+
+    For worker processes, the parent's settings may not have reached the disk yet.
+    """
+    global _settings
+    with _lock:
+        _settings = parse(values)
+
+
+def reload(settings_repo: QSettings = None):
+    """Rereads the persistent settings, for when another process has changed them."""
+    global _settings
+    with _lock:
+        _settings = parse(_read_all(settings_repo if settings_repo is not None else QSettings()))
+
+
+def _read_all(settings_repo: QSettings) -> Dict[str, str]:
+    values = {}
+    for key in settings_repo.allKeys():
+        value = settings_repo.value(key)
+        # an unquoted value with commas in it comes back as a list
+        values[key] = ", ".join(value) if isinstance(value, list) else _to_text(value)
+
+    return values
+
+
+def _read_config_file(config_file: str) -> Dict[str, str]:
+    values = {}
     with open(config_file) as in_f:
         for setting in in_f.readlines():
             if not setting.strip() or setting.startswith("#"):
                 continue
-            setting = setting.strip().split("=", 1)
-            print(f"creating setting: {setting}")
-            settings_repo.setValue(setting[0], setting[1])
+            key, value = setting.strip().split("=", 1)
+            values[key] = value
+
+    return values
+
+
+def load_from_config_file(config_file: str, settings_repo: QSettings, quiet: bool = False):
+    """Layers config.txt over the persistent settings, writing only the values that changed since last time."""
+    reload(settings_repo)
+    set_values(_read_config_file(config_file), settings_repo, quiet=quiet)
 
 
 def load_from_command_line(args: list, settings_repo: QSettings):
-    debug = True if 'DEBUG' in args else False
-    settings_repo.setValue('DEBUG', debug)
+    set_value('DEBUG', 'DEBUG' in args, settings_repo)
@@ -0,0 +1,91 @@
+# browser.py
+import logging
+import threading
+
+from laboot import metrics
+from laboot.utilities.lazy import lazy_import
+
+# imported by the background warm up rather than when the window is created
+webdriver = lazy_import("selenium.webdriver")
+exceptions = lazy_import("selenium.common.exceptions")
+
+
+class WebDriverSession:
+    """Keeps one lean Chrome session warm for the life of the application.
+
+    The session is started in the background, reused by every configuration and
+    restarted automatically if Chrome has died in the meantime.
+    """
+
+    def __init__(self, driver_location: str, headless: bool = True):
+        self.logger = logging.getLogger(__name__)
+        self.driver_location = driver_location
+        self.headless = headless
+
+        self._driver = None
+        self._driver_headless = headless
+        self._lock = threading.Lock()
+
+    def start_in_background(self):
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def get(self):
+        """Returns a live driver, starting or restarting Chrome if needed."""
+        with self._lock:
+            if self._driver is not None and (self._driver_headless != self.headless or not self._is_alive()):
+                self._quit()
+
+            if self._driver is None:
+                self._driver = self._start()
+                self._driver_headless = self.headless
+
+            return self._driver
+
+    def set_headless(self, headless: bool):
+        """Takes effect the next time the session is used."""
+        self.headless = headless
+
+    def quit(self):
+        with self._lock:
+            self._quit()
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except exceptions.WebDriverException as e:
+            self.logger.warning(f"Unable to start the browser session: {e}")
+
+    def _is_alive(self) -> bool:
+        try:
+            # any round trip to chromedriver will do
+            return bool(self._driver.window_handles)
+        except exceptions.WebDriverException:
+            return False
+
+    @metrics.timed("browser_start_seconds")
+    def _start(self):
+        self.logger.info(f"Starting browser session, headless={self.headless}.")
+
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless")
+            options.add_argument("--window-size=1280,1024")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+        capabilities = webdriver.DesiredCapabilities.CHROME.copy()
+        # return once the DOM is ready, the configuration form needs nothing else
+        capabilities["pageLoadStrategy"] = "eager"
+
+        return webdriver.Chrome(executable_path=self.driver_location, options=options,
+                                desired_capabilities=capabilities)
+
+    def _quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except exceptions.WebDriverException:
+                pass
+            self._driver = None
@@ -2,6 +2,7 @@
 import logging
 from typing import List, Callable, Any
 
+from laboot import metrics
 from laboot.config.dom.search import SearchDom
 from laboot.signals import CollectorSignals
 
@@ -40,7 +41,8 @@ class CollectorConfigurator:
         """
 
         # BUG: app will probably shit the bed if the user login page is displayed
-        self.browser.get(url)
+        with metrics.time_block("browser_page_load_seconds"):
+            self.browser.get(url)
 
         if "offline" in self.browser.page_source:
             self.signals.offline.emit("The collector appears to be offline.")
@@ -83,6 +85,7 @@ class CollectorConfigurator:
     def _handle_admin_login(self):
         pass
 
+    @metrics.timed("browser_submit_seconds")
     def _submit_changes(self):
         self.logger.info("Saving changes to the collector.")
 
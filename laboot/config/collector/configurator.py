@@ -4,9 +4,9 @@ from collections import namedtuple
 from time import sleep
 from typing import Tuple
 
-from PyQt5.QtCore import QSettings
 from selenium import webdriver
 
+from laboot.config.app.settings import get_settings
 from laboot.config.dom.constants import (serial_number_elements, correction_angle_elements,
                                          voltage_ride_through,
                                          password_element, save_config_element)
@@ -16,12 +16,12 @@ ConfigurationResult = namedtuple("ConfigurationResult", "result exc message")
 
 class Configurator:
     def __init__(self):
-        settings = QSettings()
+        settings = get_settings()
 
         self.browser = self._get_browser()
-        self.config_password = settings.value("main/config_password")
-        self.admin_user = settings.value("main/admin_user")
-        self.admin_password = settings.value("main/admin_password")
+        self.config_password = settings.config_password
+        self.admin_user = settings.admin_user
+        self.admin_password = settings.admin_password
 
     def close_browser(self):
         self.browser.quit()
@@ -66,9 +66,7 @@ class Configurator:
 
     @staticmethod
     def _get_browser():
-        settings = QSettings()
-
-        driver_executable = settings.value("drivers/chromedriver")
+        driver_executable = get_settings().chromedriver
         service_log_path = r"laboot\resources\logs\chromewebdriver.log"
         browser = webdriver.Chrome(executable_path=driver_executable,
                                    service_log_path=service_log_path)
@@ -0,0 +1,256 @@
+# httpconfig.py
+import logging
+import threading
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+from laboot import metrics
+from laboot.config.dom.constants import (serial_number_elements, password_element, frequency,
+                                         save_config_element, voltage_ride_through)
+from laboot.signals import CollectorSignals
+from laboot.utilities.http import CollectorClient
+from laboot.utilities.lazy import lazy_import
+from laboot.utilities.returns import Result
+
+requests = lazy_import("requests")
+
+# input types a browser never submits with the form
+_NOT_SUBMITTED = ("submit", "button", "image", "reset", "file")
+
+
+class UnrecognizedForm(Exception):
+    """The configuration page does not have the shape the HTTP configurator knows how to fill in."""
+
+
+class ConfigurationRejected(Exception):
+    """The form was submitted but the collector does not show the serial numbers it was given.
+
+    Submitting them again, from the browser, would not change that, so this is a failure
+    and not a reason to fall back to the Selenium configurator.
+    """
+
+
+class _Field:
+    def __init__(self, tag: str, attributes: dict):
+        self.tag = tag
+        self.name = attributes.get("name")
+        self.id = attributes.get("id")
+        self.type = (attributes.get("type") or "text").lower()
+        self.value = attributes.get("value", "on" if self.type in ("checkbox", "radio") else "")
+        self.checked = "checked" in attributes
+        self.options: List[Tuple[str, bool]] = []
+
+
+class _Form:
+    def __init__(self, attributes: dict):
+        self.action = attributes.get("action") or ""
+        self.method = (attributes.get("method") or "get").lower()
+        self.fields: List[_Field] = []
+
+    def field(self, name: str) -> Optional[_Field]:
+        return next((field for field in self.fields if field.name == name), None)
+
+    def values(self) -> List[Tuple[str, str]]:
+        """The name/value pairs a browser would submit for the form as it stands."""
+        values = []
+        for field in self.fields:
+            if not field.name or field.type in _NOT_SUBMITTED:
+                continue
+            if field.type in ("checkbox", "radio") and not field.checked:
+                continue
+            if field.tag == "select":
+                selected = [value for value, is_selected in field.options if is_selected] or \
+                           [value for value, _ in field.options[:1]]
+                values.extend((field.name, value) for value in selected)
+                continue
+
+            values.append((field.name, field.value))
+
+        return values
+
+
+class _ConfigPageParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: List[_Form] = []
+        self.ids = set()
+        self._form: Optional[_Form] = None
+        self._select: Optional[_Field] = None
+        self._option: Optional[dict] = None
+        self._textarea: Optional[_Field] = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {name: (value if value is not None else "") for name, value in attrs}
+        if "id" in attributes:
+            self.ids.add(attributes["id"])
+
+        if tag == "form":
+            self._form = _Form(attributes)
+            self.forms.append(self._form)
+        elif self._form is None:
+            return
+        elif tag in ("input", "button"):
+            field = _Field(tag, attributes)
+            if tag == "button":
+                field.type = (attributes.get("type") or "submit").lower()
+            self._form.fields.append(field)
+        elif tag == "select":
+            self._select = _Field(tag, attributes)
+            self._form.fields.append(self._select)
+        elif tag == "option" and self._select is not None:
+            self._option = attributes
+            self._option["text"] = ""
+        elif tag == "textarea":
+            self._textarea = _Field(tag, attributes)
+            self._form.fields.append(self._textarea)
+
+    def handle_data(self, data):
+        if self._option is not None:
+            self._option["text"] += data
+        elif self._textarea is not None:
+            self._textarea.value += data
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+        elif tag == "option" and self._option is not None:
+            self._close_option()
+        elif tag == "select":
+            if self._option is not None:
+                self._close_option()
+            self._select = None
+        elif tag == "textarea":
+            self._textarea = None
+
+    def _close_option(self):
+        value = self._option.get("value", self._option["text"].strip())
+        self._select.options.append((value, "selected" in self._option))
+        self._option = None
+
+
+def _find_configuration_form(page: str) -> _Form:
+    parser = _ConfigPageParser()
+    parser.feed(page)
+    parser.close()
+
+    for form in parser.forms:
+        names = {field.name for field in form.fields}
+        if not all(name in names for name in serial_number_elements + (password_element,)):
+            continue
+
+        if not any(field.name == frequency and field.type == "radio" and field.value == "60"
+                   for field in form.fields):
+            raise UnrecognizedForm("The configuration form has no 60 Hz option.")
+
+        if not any(field.id == voltage_ride_through for field in form.fields):
+            raise UnrecognizedForm("The configuration form has no voltage ride through option.")
+
+        if save_config_element not in parser.ids:
+            raise UnrecognizedForm("The configuration page has no save control.")
+
+        return form
+
+    raise UnrecognizedForm("The configuration form was not found on the page.")
+
+
+class HttpCollectorConfigurator:
+    """Configures the collector by posting the configuration form directly, no browser involved.
+
+    The form is read first so every setting that is not changed is submitted as it stands.
+    When the page does not look like the form the Selenium configurator fills in,
+    'signals.unsupported' is emitted so the caller can fall back to it.
+    """
+
+    def __init__(self, client: CollectorClient, config_url: str, password: str):
+        self.logger = logging.getLogger(__name__)
+        self.signals = CollectorSignals()
+        self.client = client
+
+        self.configuration_url = config_url
+        self.config_password = password
+
+    def start(self, serial_numbers: tuple):
+        """Configures the collector on a background thread and reports back through 'signals'."""
+        threading.Thread(target=self._run, args=(serial_numbers,), daemon=True).start()
+
+    def configure_serial_numbers(self, serial_numbers: tuple) -> Result:
+        self.logger.info("Configuring serial numbers over HTTP.")
+        self.logger.debug(f"Using serial numbers: {serial_numbers}")
+
+        try:
+            form = self._read_form()
+            data = self._fill_in(form, serial_numbers)
+            response = self._submit(form, data)
+            response.raise_for_status()
+            self._confirm(serial_numbers)
+        except UnrecognizedForm as e:
+            self.logger.info(f"HTTP configuration not possible: {e}")
+            return Result(False, None, message=str(e), exception=e)
+        except ConfigurationRejected as e:
+            self.logger.warning(str(e))
+            return Result(False, None, message=str(e), exception=e)
+        except requests.ConnectionError as e:
+            return Result(False, None, message="The collector appears to be offline.", exception=e)
+        except requests.RequestException as e:
+            return Result(False, None, message=f"Unable to configure the collector: {e}", exception=e)
+
+        self.logger.debug(f"Collector configured with serial numbers: {serial_numbers}")
+
+        return Result(True, serial_numbers, message="Collector configured.")
+
+    def _run(self, serial_numbers: tuple):
+        if result := self.configure_serial_numbers(serial_numbers):
+            self.signals.configured.emit()
+            self.signals.finished.emit()
+        elif isinstance(result.exception, UnrecognizedForm):
+            self.signals.unsupported.emit(result.message)
+        else:
+            self.signals.offline.emit(result.message)
+
+    def _read_form(self) -> _Form:
+        page = self.client.get_text(self.configuration_url)
+        if "offline" in page:
+            raise requests.ConnectionError("The collector reports it is offline.")
+
+        return _find_configuration_form(page)
+
+    def _fill_in(self, form: _Form, serial_numbers: tuple) -> List[Tuple[str, str]]:
+        vrt = next(field for field in form.fields if field.id == voltage_ride_through)
+        replaced = set(serial_number_elements[:len(serial_numbers)]) | {frequency, password_element}
+
+        data = [(name, value) for name, value in form.values()
+                if name not in replaced and not (name == vrt.name and value == vrt.value)]
+
+        data.extend(zip(serial_number_elements, serial_numbers))
+        data.append((frequency, "60"))
+        data.append((password_element, self.config_password))
+
+        save = form.field(save_config_element) or next(
+            (field for field in form.fields if field.id == save_config_element), None)
+        if save is not None and save.name and save.type in ("submit", "button", "image"):
+            data.append((save.name, save.value))
+
+        return data
+
+    @metrics.timed("http_submit_seconds")
+    def _submit(self, form: _Form, data: List[Tuple[str, str]]) -> "requests.Response":
+        self.logger.info("Saving changes to the collector.")
+        url = urljoin(self.configuration_url, form.action)
+
+        if form.method == "post":
+            return self.client.post(url, data)
+
+        return self.client.session.get(url, params=data, timeout=self.client.timeout)
+
+    def _confirm(self, serial_numbers: tuple):
+        """Reads the form back, the collector must now show the new serial numbers."""
+        try:
+            form = _find_configuration_form(self.client.get_text(self.configuration_url))
+        except UnrecognizedForm as e:
+            # the form has been submitted, whatever the page now looks like
+            raise ConfigurationRejected(f"The serial numbers could not be confirmed: {e}") from e
+        shown = tuple(form.field(name).value for name in serial_number_elements[:len(serial_numbers)])
+
+        if shown != tuple(serial_numbers):
+            raise ConfigurationRejected(f"The collector did not accept the serial numbers, it shows {shown}.")
@@ -0,0 +1,78 @@
+# registry.py
+import threading
+from collections import namedtuple
+from typing import List, Optional
+
+from laboot import constants
+from laboot.config.app.settings import Settings
+
+Collector = namedtuple("Collector", "name config_url status_url password")
+
+DEFAULT_COLLECTOR_NAME = "default"
+
+
+def load_collectors(settings: Settings) -> List[Collector]:
+    """Loads the collectors of the bench from settings.
+
+    Collectors are listed in config.txt, for example:
+
+        collectors/names=bench1 bench2
+        collectors/bench1/config_url=http://192.168.1.10/configuration.html
+        collectors/bench1/status_url=http://192.168.1.10/modemstatus.html
+        collectors/bench1/password=secret
+
+    A collector's password defaults to 'main/config_password' and its urls to the
+    ones in constants. With no collectors listed, the single collector from constants is used.
+    """
+    default_password = settings.value("main/config_password")
+    names = (settings.value("collectors/names") or "").split()
+
+    if not names:
+        return [Collector(DEFAULT_COLLECTOR_NAME, constants.URL_CONFIGURATION, constants.URL_MODEM_STATUS,
+                          default_password)]
+
+    return [Collector(name,
+                      settings.value(f"collectors/{name}/config_url", constants.URL_CONFIGURATION),
+                      settings.value(f"collectors/{name}/status_url", constants.URL_MODEM_STATUS),
+                      settings.value(f"collectors/{name}/password", default_password))
+            for name in names]
+
+
+class CollectorRegistry:
+    """The collectors of the bench and which of them are free to take a set."""
+
+    def __init__(self, collectors: List[Collector]):
+        self._collectors = {collector.name: collector for collector in collectors}
+        self._busy = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._collectors)
+
+    def __iter__(self):
+        return iter(self._collectors.values())
+
+    @property
+    def default(self) -> Collector:
+        return next(iter(self._collectors.values()))
+
+    def get(self, name: str) -> Optional[Collector]:
+        return self._collectors.get(name)
+
+    def acquire(self, name: str = None) -> Optional[Collector]:
+        """Marks a free collector busy and returns it, None if none is free."""
+        with self._lock:
+            for collector in self._collectors.values():
+                if collector.name not in self._busy and (name is None or collector.name == name):
+                    self._busy.add(collector.name)
+                    return collector
+
+        return None
+
+    def release(self, collector: Collector):
+        with self._lock:
+            self._busy.discard(collector.name)
+
+    def free(self) -> List[Collector]:
+        with self._lock:
+            return [collector for collector in self._collectors.values() if collector.name not in self._busy]
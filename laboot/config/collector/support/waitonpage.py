@@ -2,11 +2,12 @@
 
 from typing import List
 
-import requests
-from PyQt5.QtCore import QSettings, Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QMovie
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QDialogButtonBox, QHBoxLayout
 
+from laboot.poller import BackgroundPoller
+
 
 class WaitForTextOnPage(QDialog):
     """Wait until specific text is present on a page."""
@@ -40,14 +41,12 @@ class WaitForTextOnPage(QDialog):
             WaitForTextOnPage.WAIT_TIME_EXPIRED if 'wait_time' has elapsed.
         """
         super().__init__(parent)
-        settings = QSettings()
 
         self.url = url
         self.text = text
         self.wait_time = wait_time
         self.monitor = monitor
         self.is_running = False
-        self.request_timeout = int(settings.value("main/request_timeout"))
         self.check_interval = 10
         self.check_interval_remaining = self.check_interval
 
@@ -96,6 +95,10 @@ class WaitForTextOnPage(QDialog):
         self.check_page_timer = QTimer(self)
         self.check_page_timer.timeout.connect(self._check_page)
 
+        # the page is fetched off the GUI thread through the shared collector client
+        self.poller = BackgroundPoller(self)
+        self.poller.signals.polled.connect(self._on_page_checked)
+
         self.setLayout(self.main_layout)
 
     def start(self):
@@ -111,15 +114,17 @@ class WaitForTextOnPage(QDialog):
         self.check_page_timer.stop()
         self.done(WaitForTextOnPage.WAIT_TIME_EXPIRED)
 
+    def done(self, status):
+        self.check_page_timer.stop()
+        self.poller.stop()
+        super().done(status)
+
     def _check_page(self):
-        in_source: List[str] = self._get_source_as_list(self.url, self.request_timeout)
-        if self._find(self.text, in_source):
-            self.done(WaitForTextOnPage.ACCEPTED)
+        self.poller.poll(self.url, lambda source: self._find(self.text, source.split("\n")))
 
-    @staticmethod
-    def _get_source_as_list(url: str, timeout: int = 5) -> List[str]:
-        r = requests.get(url, timeout=timeout)
-        return r.text.split("\n")
+    def _on_page_checked(self, url: str, found: bool):
+        if found:
+            self.done(WaitForTextOnPage.ACCEPTED)
 
     @staticmethod
     def _find(text: str, source: List[str]) -> bool:
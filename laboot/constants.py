@@ -119,4 +119,13 @@ else:
     TEST_TIME = 1500
     LINK_CHECK_TIME = 10
 
+# bounds of the adaptive link check interval, see linkpolicy.py
+LINK_CHECK_MIN_TIME = 3
+LINK_CHECK_MAX_TIME = 60
+
 BLANK_SERIAL_NUMBER = "0"
+
+# a set whose collector can't be configured is tried this many times, this many seconds apart,
+# before successive testing leaves it on the queue
+CONFIGURE_ATTEMPTS = 3
+CONFIGURE_RETRY_DELAY = 30
@@ -1,6 +1,5 @@
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QBrush, QColor
-from PyQt5.QtMultimedia import QSound
 from PyQt5.QtWidgets import QListWidgetItem
 
 from laboot import constants
@@ -10,8 +9,8 @@ from laboot.utilities import sound
 from laboot.widgets import LabootListWidget
 
 
-_snd_passed = QSound(r"laboot/resources/audio/cash_register.wav")
-_snd_failed = QSound(r"laboot/resources/audio/error_01.wav")
+_snd_passed_file = r"laboot/resources/audio/cash_register.wav"
+_snd_failed_file = r"laboot/resources/audio/error_01.wav"
 
 _green_brush = QBrush(QColor(Qt.darkGreen))
 _red_brush = QBrush(QColor(255, 0, 0, 255))
@@ -24,16 +23,24 @@ _white_brush = QBrush(QColor(Qt.white))
 class SerialNumberViewController:
     def __init__(self, view: LabootListWidget):
         self._view = view
+        self._sounds = {}
 
     def populate_from_sensor_log(self, sensor_log):
         self._populate(sensor_log.get_serial_numbers_as_tuple())
         self._highlight_failures(sensor_log.get_failed_serial_numbers())
+        self._explain_failures([sensor for sensor in sensor_log if sensor.failure and sensor.failure_reason])
+
+    def load_sounds(self):
+        """Loads the test result sounds, otherwise they are loaded the first time a result is shown."""
+        self._get_sound(_snd_passed_file)
+        self._get_sound(_snd_failed_file)
 
     def indicate_test_result(self, result):
         sound.play_sound(self._get_sound_for_test_result(result))
         foreground_brush, background_brush = self._get_brush_for_test_result(result)
-        self._view.currentItem().setForeground(foreground_brush)
-        self._view.currentItem().setBackground(background_brush)
+        for item in self._view.findItems(result.serial_number, Qt.MatchExactly):
+            item.setForeground(foreground_brush)
+            item.setBackground(background_brush)
 
     def _populate(self, serial_numbers):
         self._add_serial_numbers_to_view(serial_numbers)
@@ -44,6 +51,11 @@ class SerialNumberViewController:
             if oscomp.os_brand == OSBrand.MAC:
                 self._set_item_text_color_to_black(item)
 
+    def _explain_failures(self, sensors):
+        for sensor in sensors:
+            for item in self._view.findItems(sensor.serial_number, Qt.MatchExactly):
+                item.setToolTip(f"Failed {sensor.failure_reason}")
+
     def _add_serial_numbers_to_view(self, serial_numbers):
         self._view.clear()
         item = None
@@ -70,9 +82,13 @@ class SerialNumberViewController:
     def _create_item_with_serial_number(serial_number):
         return QListWidgetItem(serial_number)
 
-    @staticmethod
-    def _get_sound_for_test_result(result):
-        return _snd_passed if result.result == "Pass" else _snd_failed
+    def _get_sound_for_test_result(self, result):
+        return self._get_sound(_snd_passed_file if result.result == "Pass" else _snd_failed_file)
+
+    def _get_sound(self, file_name):
+        if (snd := self._sounds.get(file_name)) is None:
+            snd = self._sounds[file_name] = sound.load_sound(file_name)
+        return snd
 
     @staticmethod
     def _get_brush_for_test_result(result):
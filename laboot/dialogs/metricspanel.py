@@ -0,0 +1,66 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
+
+from laboot import metrics
+
+COLUMNS = ("Metric", "Count", "p50", "p90", "Max", "Total")
+
+
+def _seconds(value) -> str:
+    return "" if value is None else f"{value * 1000:.2f} ms"
+
+
+class MetricsPanel(QDialog):
+    """Shows the counters and latencies collected so far, refreshed every second."""
+
+    def __init__(self, parent, registry: metrics.Registry = None):
+        super().__init__(parent)
+        self.registry = registry or metrics.get_registry()
+
+        self.setWindowTitle("Metrics")
+        self.resize(700, 400)
+
+        self.lbl_state = QLabel()
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.lbl_state)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        # only refreshed while it is open
+        self.refresh()
+        self._timer.start(1000)
+        super().showEvent(event)
+
+    def refresh(self):
+        if self.registry.enabled:
+            self.lbl_state.setText("Collecting, set metrics/export_path to keep them.")
+        else:
+            self.lbl_state.setText("Metrics are disabled, set metrics/enabled=true in config.txt.")
+
+        rows = self.registry.metrics()
+        self.table.setRowCount(len(rows))
+        for row, metric in enumerate(rows):
+            if isinstance(metric, metrics.Histogram):
+                cells = (metric.name, str(metric.count), _seconds(metric.quantile(0.5)),
+                         _seconds(metric.quantile(0.9)), _seconds(metric.max or None), f"{metric.sum:.2f} s")
+            else:
+                cells = (metric.name, str(metric.value), "", "", "", "")
+
+            for column, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                item.setToolTip(metric.description)
+                self.table.setItem(row, column, item)
+
+    def done(self, result: int):
+        self._timer.stop()
+        super().done(result)
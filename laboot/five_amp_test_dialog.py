@@ -1,36 +1,42 @@
 # five_amp_test_dialog.py
-import re
-from collections import namedtuple
+import math
+import time
 from datetime import datetime
 
-import requests
-from PyQt5.QtCore import QTimer, QEvent, Qt
+from PyQt5.QtCore import QEvent, Qt
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QProgressBar, QLineEdit, QDialogButtonBox
 
-from laboot import constants
+from laboot import constants, linkcapture
+from laboot.linkpolicy import LinkCheckPolicy
+from laboot.modemstatus import find_linked_serial_numbers
+from laboot.poller import BackgroundPoller
+from laboot.scheduler import get_scheduler, seconds_left
 from laboot.sensor import Sensor
 from laboot.signals import TestSignals
+from laboot.testengine import TestResult
+from laboot.utilities import http
 from laboot.utilities import time as utilities_time
 
-TestResult = namedtuple("TestResult", "serial_number result")
-
-link_pattern = re.compile(r"\s*\d{7}\s*\d{7}\s*\d{7}\s*-?\d{1,2}")
-serial_pattern = re.compile(r"\s*\d{7}")
-
 
 class FiveAmpTestDialog(QDialog):
-    def __init__(self, parent, sensor: Sensor):
+    def __init__(self, parent, sensor: Sensor, status_url: str = constants.URL_MODEM_STATUS):
         super().__init__(parent)
 
         self._sensor = sensor
+        self.status_url = status_url
         self.serial_number = sensor.serial_number
         self.signals = TestSignals()
 
-        self.link_timer_interval = constants.LINK_CHECK_TIME
-        self.link_timer_count_down = self.link_timer_interval
+        # remaining times are worked out from deadlines on the scheduler's clock, so they can't drift
+        self.scheduler = get_scheduler()
+        self.started = self.scheduler.clock()
         self.test_timer_interval = sensor.test_time_record.remaining_time
-        self.test_time_remaining = self.test_timer_interval
+        self.test_deadline = self.started + self.test_timer_interval
+        self.policy = LinkCheckPolicy()
+        self.link_timer_interval = math.ceil(self.policy.next_interval([self._elapsed()]))
+        self.link_deadline = self.started + self.link_timer_interval
+        self.poll_sent = None
 
         self.dialog_layout = QVBoxLayout()
 
@@ -79,10 +85,14 @@ class FiveAmpTestDialog(QDialog):
         self.setLayout(self.dialog_layout)
         self.setWindowTitle(f"Testing Sensor: {sensor.serial_number}")
 
-        # update status every second
-        self.status_timer = QTimer(self)
-        self.status_timer.timeout.connect(self.on_status_timer_timeout)
-        self.status_timer.start(1000)
+        # modem status is fetched off the GUI thread
+        self.poller = BackgroundPoller(self, fetch=http.get_client().iter_lines)
+        self.poller.signals.polled.connect(self._on_link_status)
+        self.poller.signals.failed.connect(self._on_link_check_failed)
+
+        self.deadlines = [self.scheduler.call_at(self.test_deadline, self._test_time_has_run_out),
+                          self.scheduler.call_at(self.link_deadline, self._process_link_timer)]
+        self._schedule_status_update()
 
         self.resize(300, 50)
 
@@ -91,6 +101,7 @@ class FiveAmpTestDialog(QDialog):
             self._sensor.test_time_record.set_test_interruption_time(self.test_time_remaining, datetime.now())
 
         self._kill_timers()
+        self.poller.stop()
         super().done(status)
 
     def eventFilter(self, obj, event) -> bool:
@@ -105,56 +116,80 @@ class FiveAmpTestDialog(QDialog):
         # the I don't care about other widgets response :)
         return super().eventFilter(obj, event)
 
+    @property
+    def link_timer_count_down(self) -> int:
+        return seconds_left(self.link_deadline, self.scheduler.clock())
+
+    @property
+    def test_time_remaining(self) -> int:
+        return seconds_left(self.test_deadline, self.scheduler.clock())
+
     def on_status_timer_timeout(self):
-        self._process_link_timer()
-        self._process_test_timer()
+        self._update_link_timer()
+        self._update_test_timer()
+        self._schedule_status_update()
+
+    def _schedule_status_update(self):
+        # the next time the displayed seconds change
+        now = self.scheduler.clock()
+        self.status_update = self.scheduler.call_at(self.started + int(now - self.started) + 1,
+                                                    self.on_status_timer_timeout)
 
     def _kill_timers(self):
-        if self.status_timer.isActive():
-            self.status_timer.stop()
+        for deadline in self.deadlines:
+            deadline.cancel()
+        self.status_update.cancel()
 
     def _test_time_has_run_out(self):
         self.signals.testFailed.emit(TestResult(self.serial_number, "Fail"))
         self.done(constants.TEST_TIMED_OUT)
 
     def _process_link_timer(self):
-        self.link_timer_count_down -= 1
-        self.lbl_link_check.setText(
-            f"Link check in {utilities_time.format_seconds_to_minutes_seconds(self.link_timer_count_down)}")
-
-        self.pb_link_check.setValue(self.link_timer_count_down)
+        self.lbl_link_check.setText("Checking for link...")
+        self.output.clear()
 
-        if self._is_time_to_check_link_status():
-            self.lbl_link_check.setText("Checking for link...")
-            self.output.clear()
+        if self.poller.poll(self.status_url, self._find_link):
+            self.poll_sent = time.monotonic()
 
-            if self._check_for_link():
-                self.signals.testPassed.emit(TestResult(self.serial_number, "Pass"))
-                self.done(QDialog.Accepted)
+        self.link_timer_interval = math.ceil(self.policy.next_interval([self._elapsed()]))
+        self.link_deadline = self.scheduler.clock() + self.link_timer_interval
+        self.pb_link_check.setRange(0, self.link_timer_interval)
+        self.deadlines.append(self.scheduler.call_at(self.link_deadline, self._process_link_timer))
 
-            QTimer(self).singleShot(1000, lambda: self.output.setText("no connection detected"))
-            self.link_timer_count_down = self.link_timer_interval
+    def _update_link_timer(self):
+        self.lbl_link_check.setText(
+            f"Link check in {utilities_time.format_seconds_to_minutes_seconds(self.link_timer_count_down)}")
 
-    def _process_test_timer(self):
-        self.test_time_remaining -= 1
+        self.pb_link_check.setValue(self.link_timer_count_down)
 
+    def _update_test_timer(self):
         self.pb_test_time.setValue(self.test_time_remaining)
         self.pb_test_time.update()  # update visuals immediately
 
-        if self.test_time_remaining <= 0:
-            self._test_time_has_run_out()
-
         self.lbl_remaining_time_header.setText(
             f"Test time remaining: {utilities_time.format_seconds_to_minutes_seconds(self.test_time_remaining)}\t\t\t"
         )
 
-    def _is_time_to_check_link_status(self) -> bool:
-        return self.link_timer_count_down <= 0
-
-    def _check_for_link(self):
-        for line in [line for line in requests.get(constants.URL_MODEM_STATUS).text.split('\n')
-                     if serial_pattern.match(line)]:
-            if (match := link_pattern.match(line)) and match[0].split()[0] == self.serial_number:
-                return True
-
-        return False
+    def _find_link(self, lines) -> bool:
+        # runs on the poller thread
+        return self.serial_number in find_linked_serial_numbers(lines, (self.serial_number,),
+                                                                linkcapture.get_recorder())
+
+    def _elapsed(self) -> float:
+        return constants.TEST_TIME - (self.test_deadline - self.scheduler.clock())
+
+    def _poll_time(self) -> float:
+        return time.monotonic() - self.poll_sent if self.poll_sent else 0.0
+
+    def _on_link_check_failed(self, url: str, message: str):
+        self.policy.record_poll(self._poll_time(), False)
+        self.output.setText("unable to read modem status")
+
+    def _on_link_status(self, url: str, linked: bool):
+        self.policy.record_poll(self._poll_time(), True)
+        if linked:
+            self.policy.record_link(self._elapsed())
+            self.signals.testPassed.emit(TestResult(self.serial_number, "Pass"))
+            self.done(QDialog.Accepted)
+        else:
+            self.output.setText("no connection detected")
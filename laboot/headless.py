@@ -0,0 +1,195 @@
+# headless.py
+"""Runs whole sets from the command line, no GUI involved.
+
+    python cli.py run --workbooks traveller_folder/ [--collector bench1 ...] [--no-save]
+
+Spreadsheets are imported, every collector is configured and tests its sets in
+parallel, and results are written back to the spreadsheets. Progress is printed
+to stdout as one JSON object per line, logging goes to stderr.
+"""
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+from datetime import datetime
+from typing import List
+
+from PyQt5.QtCore import QSettings
+
+from laboot import batchimport, constants, linkcapture, linkpolicy, metrics, spreadsheet
+from laboot.config.app import settings as lab_settings
+from laboot.config.collector.registry import Collector, CollectorRegistry, load_collectors
+from laboot.orchestrator import ResultWriter, StationEvent, StationOrchestrator, make_configure
+from laboot.setqueue import make_station_set
+from laboot.utilities.returns import Result
+
+CONFIG_FILE = r"laboot/resources/data/config.txt"
+
+
+class ProgressPrinter:
+    """Prints progress as line-delimited JSON, safe to call from any thread."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, **fields):
+        record = {"time": datetime.now().isoformat(timespec="seconds"), "event": event, **fields}
+        with self._lock:
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+
+class HeadlessStation:
+    """Tests the imported sets on the collectors and saves their results as each set finishes.
+
+    Results are saved in the background, a collector goes on to its next set meanwhile.
+    """
+
+    def __init__(self, registry: CollectorRegistry, progress: ProgressPrinter, save: bool = True,
+                 link_check_time: int = constants.LINK_CHECK_TIME):
+        self.progress = progress
+        self.save = save
+        self.errors = 0
+        self.results = {"Pass": 0, "Fail": 0}
+        self.orchestrator = StationOrchestrator(registry, configure=make_configure(), on_event=self.on_event,
+                                                link_check_time=link_check_time)
+        self.writer = ResultWriter(self._save, on_saved=self.on_saved)
+        self._lock = threading.Lock()
+
+    def on_event(self, event: StationEvent):
+        name = event.station_set.name
+        collector = event.collector.name
+
+        if event.kind in ("configuring", "configured"):
+            self.progress(event.kind, set=name, collector=collector)
+        elif event.kind == "result":
+            with self._lock:
+                self.results[event.payload.result] = self.results.get(event.payload.result, 0) + 1
+            self.progress("result", set=name, collector=collector,
+                          serial_number=event.payload.serial_number, result=event.payload.result)
+        elif event.kind in ("finished", "cancelled"):
+            self.progress(event.kind, set=name, collector=collector,
+                          results=dict(event.payload))
+            # without a journal to resume from, what was tested of a cancelled set is saved too
+            if self.save:
+                self.writer.submit(event.station_set)
+        elif event.kind == "error":
+            self.report_error(name, event.payload, collector=collector)
+
+    def start(self):
+        self.writer.start()
+        self.orchestrator.start()
+
+    def wait(self):
+        """Returns once every set has been tested and its results saved."""
+        self.orchestrator.close()
+        self.orchestrator.wait()
+        self.writer.close()
+
+    @staticmethod
+    def _save(station_set) -> Result:
+        return spreadsheet.save_test_results(station_set.source, station_set.sensors.get_test_results())
+
+    def on_saved(self, station_set, result: Result):
+        if result:
+            self.progress("saved", set=station_set.name, path=station_set.source)
+        else:
+            self.report_error(station_set.name, result.message)
+
+    def report_error(self, name: str, message: str, **fields):
+        with self._lock:
+            self.errors += 1
+        self.progress("error", set=name, message=message, **fields)
+
+
+def _parse_collectors(values: List[str], settings: lab_settings.Settings) -> List[Collector]:
+    """Collectors from settings by name, or defined on the command line as NAME=CONFIG_URL,STATUS_URL."""
+    configured = {collector.name: collector for collector in load_collectors(settings)}
+    if not values:
+        return list(configured.values())
+
+    collectors = []
+    for value in values:
+        name, _, urls = value.partition("=")
+        if urls:
+            config_url, _, status_url = urls.partition(",")
+            collectors.append(Collector(name, config_url, status_url or constants.URL_MODEM_STATUS,
+                                        settings.config_password))
+        elif name in configured:
+            collectors.append(configured[name])
+        else:
+            raise ValueError(f"Collector '{name}' is not in the configuration.")
+
+    return collectors
+
+
+def _make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py run", description="Tests whole sets without the GUI.")
+    parser.add_argument("--workbooks", nargs="+", required=True, metavar="PATH",
+                        help="spreadsheets, or folders of them, to test")
+    parser.add_argument("--collector", action="append", metavar="NAME[=CONFIG_URL,STATUS_URL]",
+                        help="collector to use, may be repeated, defaults to every configured collector")
+    parser.add_argument("--link-check-time", type=int, default=constants.LINK_CHECK_TIME)
+    parser.add_argument("--no-save", action="store_true", help="don't write results to the spreadsheets")
+    parser.add_argument("--config", default=CONFIG_FILE)
+
+    return parser
+
+
+def main(args: List[str]) -> int:
+    options = _make_parser().parse_args(args)
+    progress = ProgressPrinter()
+
+    settings = QSettings()
+    lab_settings.load_from_config_file(options.config, settings, quiet=True)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s : %(name)s : %(levelname)s : %(message)s")
+    metrics.configure(lab_settings.get_settings())
+
+    try:
+        registry = CollectorRegistry(_parse_collectors(options.collector, lab_settings.get_settings()))
+    except ValueError as e:
+        progress("error", message=str(e))
+        return 2
+
+    if not (paths := batchimport.expand_paths(options.workbooks)):
+        progress("error", message="No spreadsheets were found.")
+        return 2
+
+    station = HeadlessStation(registry, progress, save=not options.no_save, link_check_time=options.link_check_time)
+
+    def interrupt(signum, frame):
+        # like cancelling a test dialog, the remaining test time is recorded on the sensors
+        progress("interrupted")
+        station.orchestrator.stop()
+
+    signal.signal(signal.SIGINT, interrupt)
+    station.start()
+
+    sets = []
+
+    def submit(imported):
+        # tested as soon as it is read, while the rest are still being imported
+        if not imported.result:
+            station.report_error(imported.path, imported.result.message)
+            return
+
+        station_set = make_station_set(imported.path, imported.result())
+        progress("imported", set=station_set.name, path=imported.path,
+                 serial_numbers=list(station_set.sensors.get_serial_numbers_as_tuple()))
+        station.orchestrator.submit(station_set)
+        sets.append(station_set)
+
+    batchimport.import_all(paths, on_imported=submit)
+    station.wait()
+    linkpolicy.get_history().save(settings)
+    linkcapture.close()
+    metrics.shutdown()
+
+    progress("summary", sets=len(sets), passed=station.results.get("Pass", 0), failed=station.results.get("Fail", 0),
+             errors=station.errors)
+
+    return 1 if station.errors else 0
@@ -0,0 +1,251 @@
+# journal.py
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from laboot.sensor import Sensor, SensorLog
+from laboot.utilities.time import TestTimeRecord
+
+# what replaying the journal restores, 'saved' is False when there are results not yet in the workbook and
+# 'queued' holds the Sessions of the sets that were being tested successively and are not yet saved, when
+# the set journaled last is one of them 'source' and 'sensors' are None
+Session = namedtuple("Session", "source sensors saved queued", defaults=((),))
+
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+
+def _sensor_state(sensor: Sensor) -> list:
+    record = sensor.test_time_record
+    interruption_time = record.interruption_time.isoformat() if record.interruption_time else None
+    return [sensor.position, sensor.serial_number, sensor.failure, sensor.failure_reason,
+            sensor.result if sensor.tested else None, record.test_time, interruption_time]
+
+
+def _restore_sensor(state: list) -> Sensor:
+    position, serial_number, failure, failure_reason, result, test_time, interruption_time = state
+    sensor = Sensor(position, serial_number, failure, failure_reason)
+    if result is not None:
+        sensor.result = result
+        sensor.tested = True
+    if interruption_time is not None:
+        _interrupt(sensor, test_time, interruption_time)
+
+    return sensor
+
+
+def _interrupt(sensor: Sensor, remaining_time: int, interruption_time: str):
+    record = TestTimeRecord(remaining_time)
+    record.set_test_interruption_time(remaining_time, datetime.fromisoformat(interruption_time))
+    sensor.set_test_time(record)
+
+
+class Journal:
+    """An append-only log of the session, so a crash doesn't lose the bench time spent testing.
+
+    Every set loaded, test started, result recorded and test interrupted is appended
+    as one JSON line. Sets tested successively are journaled side by side, their
+    records name the set by its source. Lines are written immediately but fsync'ed in batches by a background
+    thread, at most 'flush_interval' seconds after they were appended.
+
+    Parameters
+    ----------
+    path: str
+        the journal file, created if it doesn't exist
+
+    flush_interval: float
+        the longest time, in seconds, an appended record waits to reach the disk
+    """
+
+    def __init__(self, path: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._end_torn_line()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="journal", daemon=True)
+        self._flusher.start()
+
+    def record_set(self, source: str, sensors: SensorLog, successive: bool = False):
+        """A new set replaces the session, whatever was journaled before it no longer matters.
+
+        A set tested successively joins the other successive sets instead, until it is saved.
+        """
+        record = {"kind": "set", "source": source, "sensors": [_sensor_state(s) for s in sensors]}
+        if successive:
+            record["successive"] = True
+        self._append(record)
+
+    def record_result(self, serial_number: str, result: str, source: str = None):
+        self._append(_for_set({"kind": "result", "serial_number": serial_number, "result": result}, source))
+
+    def record_started(self, sensor: Sensor, source: str = None):
+        """A test's remaining time from now, so a crash during the test doesn't restart it at full time.
+
+        Like an interruption, the time keeps running out from here until the test is resumed.
+        """
+        self._append(_for_set({"kind": "started", "serial_number": sensor.serial_number,
+                               "remaining_time": sensor.remaining_time, "at": datetime.now().isoformat()}, source))
+
+    def record_saved(self, source: str):
+        """The results of a successive set are in its workbook, it is no longer needed to resume."""
+        self._append({"kind": "saved", "source": source})
+
+    def record_interruption(self, sensor: Sensor, source: str = None):
+        record = sensor.test_time_record
+        if record.interruption_time:
+            self._append(_for_set({"kind": "interrupted", "serial_number": sensor.serial_number,
+                                   "remaining_time": record.test_time,
+                                   "at": record.interruption_time.isoformat()}, source))
+
+    def record_time_reset(self, serial_number: str):
+        self._append({"kind": "reset", "serial_number": serial_number})
+
+    def compact(self, source: str, sensors: SensorLog):
+        """Rewrites the journal as a single record of the session once its results are in the workbook."""
+        self._rewrite([{"kind": "set", "source": source, "sensors": [_sensor_state(s) for s in sensors]}])
+
+    def clear(self):
+        self._rewrite([])
+
+    def keep_unsaved(self, sets: Iterable[Tuple[str, SensorLog]]):
+        """Rewrites the journal with only the successive sets, source and sensors, whose results are
+        not in their workbooks yet, they are resumed at the next start."""
+        self._rewrite([{"kind": "set", "source": source, "sensors": [_sensor_state(s) for s in sensors],
+                        "successive": True} for source, sensors in sets])
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            self._flush()
+            self._file.close()
+
+    def _end_torn_line(self):
+        # a crash can leave the last line half written, don't let the next record join it
+        with open(self.path, "rb") as in_f:
+            if in_f.seek(0, os.SEEK_END) == 0:
+                return
+            in_f.seek(-1, os.SEEK_END)
+            torn = in_f.read(1) != b"\n"
+
+        if torn:
+            self._file.write("\n")
+            self._dirty = True
+
+    def _append(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._dirty = True
+
+    def _flush(self):
+        if self._dirty and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                self.logger.error(f"Unable to write the journal: {e}")
+
+    def _rewrite(self, records: list):
+        with self._lock:
+            self._file.close()
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            handle, temporary_name = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            with os.fdopen(handle, "w", encoding="utf-8") as out_f:
+                out_f.writelines(json.dumps(record) + "\n" for record in records)
+                out_f.flush()
+                os.fsync(out_f.fileno())
+            os.replace(temporary_name, self.path)
+
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._dirty = False
+
+
+def _for_set(record: dict, source: Optional[str]) -> dict:
+    # without a source a record belongs to the set journaled last
+    if source is not None:
+        record["source"] = source
+    return record
+
+
+def replay(path: str) -> Optional[Session]:
+    """Rebuilds the session from the journal, None if there is nothing to resume.
+
+    The session is the set journaled last, successive sets that had not been saved
+    are its 'queued' sessions instead. A line left half written by a crash is ignored.
+    """
+    try:
+        with open(path, encoding="utf-8") as in_f:
+            lines = in_f.readlines()
+    except FileNotFoundError:
+        return None
+
+    # source -> [sensors, saved, successive], in the order the sets were journaled
+    sets = {}
+    current = None
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+
+        # valid JSON that isn't a record, from another version or a damaged file
+        if not isinstance(record, dict) or (kind := record.get("kind")) is None:
+            continue
+
+        if kind == "set":
+            successive = record.get("successive", False)
+            if not successive:
+                sets.clear()
+            # a set is journaled as loaded or as saved, only results recorded after it are unsaved
+            current = record["source"]
+            sensors = SensorLog()
+            for state in record["sensors"]:
+                sensors.append(_restore_sensor(state))
+            sets.pop(current, None)
+            sets[current] = [sensors, True, successive]
+            continue
+
+        if (entry := sets.get(record.get("source", current))) is None:
+            continue
+
+        if kind == "saved":
+            entry[1:] = [True, False]
+            continue
+
+        sensors = entry[0]
+        if (sensor := sensors.get_sensor(record["serial_number"])) is None:
+            continue
+
+        if kind == "result":
+            sensors.set_test_result(sensor.serial_number, record["result"])
+            entry[1] = False
+        elif kind in ("started", "interrupted"):
+            _interrupt(sensor, record["remaining_time"], record["at"])
+        elif kind == "reset":
+            sensor.test_time_record.reset()
+
+    queued = tuple(Session(source, entry[0], entry[1]) for source, entry in sets.items() if entry[2] and entry[0])
+    if current in sets and not sets[current][2] and sets[current][0]:
+        sensors, saved, _ = sets[current]
+        return Session(current, sensors, saved, queued)
+
+    return Session(None, None, True, queued) if queued else None
@@ -0,0 +1,224 @@
+# linkcapture.py
+"""Keeps what every modem status poll saw of each sensor under test.
+
+Each observation is the time, serial number, link state, peers and RSSI of one
+sensor in one poll. The latest ones are held in a fixed size ring buffer, so
+memory stays the same however long the shift, and every observation is
+appended to the session's archive, 22 bytes each.
+
+Summarise an archive, time to link from the first poll and signal strength per sensor:
+
+    python -m laboot.linkcapture links/20201021-071500.links
+"""
+import argparse
+import atexit
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from laboot.config.app.settings import get_settings
+from laboot.modemstatus import ModemStatus
+
+Observation = namedtuple("Observation", "time serial_number linked peers rssi")
+
+# per sensor: its first poll, when it first linked (None if it never did), how many polls saw it
+# and its RSSI in each poll since linking
+SensorTrace = namedtuple("SensorTrace", "serial_number first_seen linked_at polls rssi")
+
+MAGIC = b"LBLINKS1"
+# time, serial number, linked, peer 1, peer 2, rssi; peers are 0 and rssi NO_RSSI until linked
+_record = struct.Struct("<dI?IIb")
+NO_RSSI = -128
+
+DEFAULT_CAPACITY = 65536
+FLUSH_EVERY = 256
+FLUSH_INTERVAL = 30.0
+
+
+class ObservationBuffer:
+    """The last 'capacity' observations in parallel arrays, the oldest is overwritten first."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._serial_numbers = array("I", bytes(4 * capacity))
+        self._linked = array("b", bytes(capacity))
+        self._peers_1 = array("I", bytes(4 * capacity))
+        self._peers_2 = array("I", bytes(4 * capacity))
+        self._rssi = array("b", bytes(capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, when: float, status: ModemStatus):
+        i = self._next
+        self._times[i] = when
+        self._serial_numbers[i] = int(status.serial_number)
+        self._linked[i] = status.linked
+        self._peers_1[i], self._peers_2[i] = (int(peer) for peer in status.peers) if status.peers else (0, 0)
+        self._rssi[i] = NO_RSSI if status.rssi is None else status.rssi
+
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, count: int) -> List[tuple]:
+        """The last 'count' observations as packed record fields, oldest first."""
+        count = min(count, self._count)
+        start = (self._next - count) % self.capacity
+        return [(self._times[i], self._serial_numbers[i], bool(self._linked[i]), self._peers_1[i], self._peers_2[i],
+                 self._rssi[i]) for i in ((start + n) % self.capacity for n in range(count))]
+
+    def __iter__(self) -> Iterator[Observation]:
+        return (_to_observation(fields) for fields in self.latest(self._count))
+
+
+def _to_observation(fields: tuple) -> Observation:
+    when, serial_number, linked, peer_1, peer_2, rssi = fields
+    return Observation(when, f"{serial_number:07d}", linked,
+                       (f"{peer_1:07d}", f"{peer_2:07d}") if linked else None, None if rssi == NO_RSSI else rssi)
+
+
+class LinkRecorder:
+    """Records modem status observations in memory and appends them to 'path'.
+
+    Observations are written in batches of 'flush_every', or whatever there is
+    after 'flush_interval' seconds, so a poll rarely waits on the disk. Without a
+    path they are only kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY,
+                 flush_every: int = FLUSH_EVERY, flush_interval: float = FLUSH_INTERVAL):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.buffer = ObservationBuffer(capacity)
+        self.flush_every = min(flush_every, capacity)
+        self.flush_interval = flush_interval
+
+        self._file: Optional[BinaryIO] = None
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, statuses: Iterable[ModemStatus], when: float = None):
+        when = time.time() if when is None else when
+        with self._lock:
+            for status in statuses:
+                self.buffer.append(when, status)
+                self._unflushed += 1
+
+            if self._unflushed >= self.flush_every or time.monotonic() - self._flushed_at > self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        self._flushed_at = time.monotonic()
+        if not self._unflushed or self.path is None:
+            self._unflushed = 0
+            return
+
+        try:
+            if self._file is None:
+                self._file = _open_archive(self.path)
+            self._file.write(b"".join(_record.pack(*fields) for fields in self.buffer.latest(self._unflushed)))
+            self._file.flush()
+        except OSError as e:
+            self.logger.warning(f"Unable to write link observations to '{self.path}': {e}")
+        self._unflushed = 0
+
+
+def _open_archive(path: str) -> BinaryIO:
+    if directory := os.path.dirname(path):
+        os.makedirs(directory, exist_ok=True)
+
+    archive = open(path, "ab")
+    if archive.tell() == 0:
+        archive.write(MAGIC)
+
+    return archive
+
+
+def read_archive(path: str) -> Iterator[Observation]:
+    with open(path, "rb") as in_f:
+        if in_f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is not a link observation archive.")
+
+        # a record torn by a crash is left out
+        while len(data := in_f.read(_record.size * 1024)) >= _record.size:
+            usable = len(data) - len(data) % _record.size
+            yield from (_to_observation(fields) for fields in _record.iter_unpack(data[:usable]))
+
+
+def summarize(observations: Iterable[Observation]) -> Dict[str, SensorTrace]:
+    """Time to link and signal strength of each sensor, in the order they were first seen."""
+    # serial number -> [first seen, linked at, polls, rssi]
+    traces = {}
+    for observation in observations:
+        if (trace := traces.get(observation.serial_number)) is None:
+            trace = traces[observation.serial_number] = [observation.time, None, 0, []]
+        trace[2] += 1
+        if observation.linked:
+            if trace[1] is None:
+                trace[1] = observation.time
+            trace[3].append(observation.rssi)
+
+    return {serial_number: SensorTrace(serial_number, *trace) for serial_number, trace in traces.items()}
+
+
+_recorder: Optional[LinkRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder() -> LinkRecorder:
+    """The recorder of this session, its archive is named after the time the session started."""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            settings = get_settings()
+            directory = settings.value("linkcapture/directory")
+            path = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}.links") if directory else None
+            _recorder = LinkRecorder(path, int(settings.value("linkcapture/capacity", DEFAULT_CAPACITY)))
+            atexit.register(_recorder.close)
+
+        return _recorder
+
+
+def close():
+    with _recorder_lock:
+        if _recorder is not None:
+            _recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarises a link observation archive.")
+    parser.add_argument("archive")
+    args = parser.parse_args()
+
+    print(f"{'serial':<8} {'first poll':<20} {'to link':>8} {'polls':>6} {'rssi min/mean/max':>18}")
+    for trace in summarize(read_archive(args.archive)).values():
+        seen = datetime.fromtimestamp(trace.first_seen).strftime("%Y-%m-%d %H:%M:%S")
+        to_link = f"{trace.linked_at - trace.first_seen:.0f} s" if trace.linked_at is not None else "never"
+        rssi = [value for value in trace.rssi if value is not None]
+        signal = f"{min(rssi)}/{sum(rssi) / len(rssi):.0f}/{max(rssi)}" if rssi else ""
+        print(f"{trace.serial_number:<8} {seen:<20} {to_link:>8} {trace.polls:>6} {signal:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# linkpolicy.py
+import random
+import statistics
+import threading
+from collections import deque
+from typing import Callable, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QSettings
+
+from laboot import constants
+from laboot.config.app import settings as lab_settings
+
+# link times needed before the policy trusts the history
+MIN_SAMPLES = 10
+MAX_SAMPLES = 200
+
+# past the window the interval stretches to at most this many times the normal one
+OUTSIDE_WINDOW_STRETCH = 3
+
+
+class LinkHistory:
+    """How long sensors took to link, in seconds from the start of their test.
+
+    Shared by every test on the bench and kept between runs in settings.
+    """
+
+    def __init__(self, link_times: Iterable[float] = (), max_samples: int = MAX_SAMPLES):
+        self._link_times = deque(link_times, maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._link_times)
+
+    def add(self, link_time: float):
+        with self._lock:
+            self._link_times.append(link_time)
+
+    def window(self) -> Optional[Tuple[float, float]]:
+        """The 10th to 90th percentile of link times, None until there are enough of them."""
+        with self._lock:
+            if len(self._link_times) < MIN_SAMPLES:
+                return None
+            deciles = statistics.quantiles(self._link_times, n=10)
+
+        return deciles[0], deciles[-1]
+
+    @classmethod
+    def load(cls, settings: lab_settings.Settings) -> "LinkHistory":
+        link_times = []
+        for value in (settings.value("linkpolicy/history") or "").split():
+            try:
+                link_times.append(float(value))
+            except ValueError:
+                pass
+
+        return cls(link_times)
+
+    def save(self, settings_repo: QSettings = None):
+        with self._lock:
+            history = " ".join(f"{t:.0f}" for t in self._link_times)
+        lab_settings.set_value("linkpolicy/history", history, settings_repo)
+
+
+_history: Optional[LinkHistory] = None
+
+
+def get_history() -> LinkHistory:
+    global _history
+    if _history is None:
+        _history = LinkHistory.load(lab_settings.get_settings())
+
+    return _history
+
+
+class LinkCheckPolicy:
+    """Decides how long to wait before the next modem status poll.
+
+    Polls every 'min_interval' while any sensor under test is inside the window
+    where links usually come up. Before the window it waits until the window opens,
+    but never longer than 'interval', so an early link isn't found later than without
+    the history. After the window the interval grows with how late the sensors are,
+    within OUTSIDE_WINDOW_STRETCH times 'interval'. Without enough history it polls every
+    'interval'. Consecutive failed polls double the interval
+    and a slow collector is given several times its response time, both up to
+    'max_interval'. The interval is then jittered so stations sharing a network
+    don't poll in lockstep.
+
+    Parameters
+    ----------
+    history: LinkHistory
+        observed link times, the shared history by default
+
+    interval: float
+        the interval used without enough history
+
+    jitter: float
+        the interval is spread by up to this fraction either way
+    """
+
+    def __init__(self, history: LinkHistory = None, interval: float = constants.LINK_CHECK_TIME,
+                 min_interval: float = constants.LINK_CHECK_MIN_TIME,
+                 max_interval: float = constants.LINK_CHECK_MAX_TIME,
+                 jitter: float = 0.2, slow_response: float = 2.0,
+                 random_fraction: Callable[[], float] = random.random):
+        self.history = history if history is not None else get_history()
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.max_interval = max(max_interval, interval)
+        self.jitter = jitter
+        self.slow_response = slow_response
+
+        self._random_fraction = random_fraction
+        self._failures = 0
+        self._response_time = 0.0
+
+    def next_interval(self, elapsed: Iterable[float]) -> float:
+        """The wait before the next poll, 'elapsed' is the time each sensor under test has been on test."""
+        interval = self._base_interval(list(elapsed))
+
+        if self._failures:
+            interval = max(interval, self.interval * 2 ** self._failures)
+        if self._response_time > self.slow_response:
+            interval = max(interval, 4 * self._response_time)
+
+        interval = min(interval, self.max_interval)
+        interval *= 1 + self.jitter * (2 * self._random_fraction() - 1)
+
+        return max(interval, self.min_interval)
+
+    def record_poll(self, response_time: float, succeeded: bool):
+        self._response_time = response_time
+        self._failures = 0 if succeeded else min(self._failures + 1, 8)
+
+    def record_link(self, elapsed: float):
+        self.history.add(elapsed)
+
+    def _base_interval(self, elapsed: list) -> float:
+        if not elapsed or (window := self.history.window()) is None:
+            return self.interval
+
+        start, end = window
+        if any(start <= e <= end for e in elapsed):
+            return self.min_interval
+
+        if until_window := [start - e for e in elapsed if e < start]:
+            return max(self.min_interval, min(min(until_window), self.interval))
+
+        # every sensor is past the window, the later they are the less likely they are to link at all
+        late = min(e - end for e in elapsed)
+        return min(OUTSIDE_WINDOW_STRETCH * self.interval, self.interval * (1 + late / max(end - start, 1)))
@@ -1,25 +1,42 @@
 import logging
-from PyQt5.QtCore import Qt, QTimer, QSettings
+import os
+import threading
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QPixmap, QIcon, QCloseEvent, QCursor
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout,
                              QListWidgetItem, QLabel,
                              QHBoxLayout, QMessageBox, QAction, QStatusBar, QToolBar, QWidget, QMenu)
-from selenium import webdriver
-from time import sleep
-from typing import Callable, Optional
+from typing import Callable, Dict, Optional
 
 import linewatchshared
-from laboot import spreadsheet, constants
-from laboot.config.collector import collector
+from laboot import journal, linkcapture, linkpolicy, metrics, constants
+from laboot.config.app import logging as lab_logging
+from laboot.config.app import settings as lab_settings
+from laboot.config.collector.browser import WebDriverSession
+from laboot.config.collector.httpconfig import HttpCollectorConfigurator
+from laboot.config.collector.registry import CollectorRegistry, load_collectors
 from laboot.controllers import SerialNumberViewController
+from laboot.dialogs.metricspanel import MetricsPanel
 from laboot.five_amp_test_dialog import FiveAmpTestDialog
+from laboot.orchestrator import ResultWriter, StationEvent, StationOrchestrator, StationSet, make_configure
 from laboot.sensor import Sensor, SensorLog
+from laboot.set_test_dialog import SetTestDialog
 from laboot.setdialog import SetDialog
-from laboot.signals import DropSignals
+from laboot.setqueue import SetQueue, make_station_set
+from laboot.signals import BatchImportSignals, DropSignals, StationSignals
+from laboot.testengine import TestResult
+from laboot.utilities import http
 from laboot.utilities import time as util_time
+from laboot.utilities.lazy import lazy_import, preload
 from laboot.utilities.returns import Result
 from laboot.widgets import LabootListWidget
 
+# openpyxl and numpy take longer to import than the window takes to appear, these are
+# preloaded in the background once it has
+batchimport = lazy_import("laboot.batchimport")
+spreadsheet = lazy_import("laboot.spreadsheet")
+collector = lazy_import("laboot.config.collector.collector")
+
 
 def version():
     # version that shows in help dialog
@@ -31,9 +48,6 @@ def dialog_title():
 
 
 class MainWindow(QMainWindow):
-
-    PAUSE_FOR_WEB_SERVER_BROWSER_COMMUNICATION = 5
-
     def __init__(self, parent=None):
         super().__init__(parent, flags=Qt.Window)
 
@@ -41,9 +55,32 @@ class MainWindow(QMainWindow):
         self.setAcceptDrops(True)
         self.signals = DropSignals()
         self.signals.dropped_filename.connect(self._handle_file_drop)
+        self.batch_signals = BatchImportSignals()
+        self.batch_signals.imported.connect(self._on_batch_file_imported)
+        self.batch_signals.finished.connect(self._on_batch_import_finished)
+        self.set_queue = SetQueue()
+        self._batch_imports = []
+        self.station_signals = StationSignals()
+        self.station_signals.event.connect(self._on_station_event)
+        self.station_signals.saved.connect(self._on_station_set_saved)
+        self.station_signals.stopped.connect(self._on_successive_testing_stopped)
+        # successive testing, started the first time the option is selected
+        self.orchestrator: Optional[StationOrchestrator] = None
+        self.result_writer: Optional[ResultWriter] = None
+        self._sets_in_flight = 0
+        # source -> the successive sets tested, or being tested, whose results are not saved yet
+        self._unsaved_station_sets: Dict[str, StationSet] = {}
+        self._closing = False
+        self.metrics_panel: Optional[MetricsPanel] = None
         self.need_to_save = False
         self.browser = None
+        settings = lab_settings.get_settings()
+        self.browser_session = WebDriverSession(constants.CHROMEDRIVER_PATH, headless=settings.headless)
+        self.http_configurator = None
+        self.collectors = CollectorRegistry(load_collectors(settings))
         self.change_tracker = linewatchshared.ChangeTracker()
+        self.journal = journal.Journal(settings.journal)
+        lab_settings.signals.changed.connect(self._on_settings_changed)
 
         self.spreadsheet_path: str = ""
         self._sensor_log = SensorLog()
@@ -92,13 +129,51 @@ class MainWindow(QMainWindow):
         self.resize(500, 550)
         self.show()
 
+        QTimer.singleShot(0, self._resume_session)
+
+        # Chrome is slow to start, have it ready by the time a configuration needs it
+        QTimer.singleShot(0, self.browser_session.start_in_background)
+        QTimer.singleShot(0, self._finish_startup)
+
+    def _finish_startup(self):
+        # the window is up, load what was left out of starting it
+        preload([spreadsheet, batchimport, collector])
+        self._serial_view_controller.load_sounds()
+        if self.options_successive_testing_action.isChecked():
+            self._start_successive_testing()
+
     def closeEvent(self, event: QCloseEvent):
-        if self._ok_to_discard_test_results():
-            self._save_ui_state(QSettings())
-            logging.shutdown()
-            event.accept()
-        else:
+        if not self._closing:
+            if self._sets_in_flight and not self._ask_yes_no_question("Sets are still being tested.\n" +
+                                                                      "Do you want to stop testing and exit?"):
+                event.ignore()
+                return
+
+            if not self._ok_to_discard_test_results():
+                event.ignore()
+                return
+
+            self._closing = True
+            self._save_ui_state()
+            if self.orchestrator is not None:
+                # the window closes again once the tests are cancelled and the finished sets saved
+                self.statusBar().showMessage("Stopping the tests...")
+                self._stop_successive_testing()
+
+        if self.orchestrator is not None:
             event.ignore()
+            return
+
+        linkpolicy.get_history().save()
+        self.browser_session.quit()
+        # a clean exit leaves nothing to resume but the successive sets not saved, cancelled ones included
+        self.journal.keep_unsaved((station_set.source, station_set.sensors)
+                                  for station_set in self._unsaved_station_sets.values())
+        self.journal.close()
+        linkcapture.close()
+        metrics.shutdown()
+        lab_logging.shutdown()
+        event.accept()
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls:
@@ -111,16 +186,35 @@ class MainWindow(QMainWindow):
         if event.mimeData().hasUrls:
             event.setDropAction(Qt.CopyAction)
             event.accept()
-            self.spreadsheet_path = event.mimeData().urls()[0].toLocalFile()
-            self.signals.dropped_filename.emit()
+            paths = [url.toLocalFile() for url in event.mimeData().urls()]
+            if len(paths) == 1 and not os.path.isdir(paths[0]) and not self._successive_testing():
+                self.spreadsheet_path = paths[0]
+                self.signals.dropped_filename.emit()
+            else:
+                self._import_batch(paths)
         else:
             event.ignore()
 
     def on_save_test_results_action_triggered(self):
-        spreadsheet.save_test_results(self.spreadsheet_path, self._sensor_log.get_test_results())
+        if spreadsheet.save_test_results(self.spreadsheet_path, self._sensor_log.get_test_results()):
+            self._unsaved_station_sets.pop(self.spreadsheet_path, None)
+            self.journal.compact(self.spreadsheet_path, self._sensor_log)
         QMessageBox.information(self, dialog_title(), "Test results saved.", QMessageBox.Ok)
 
     def on_configure_collector_action_triggered(self, serial_numbers, password, config_url, get_driver: Callable):
+        if serial_numbers:
+            # posting the form directly is much faster, the browser is only needed when the form isn't recognized
+            self.http_configurator = HttpCollectorConfigurator(http.get_client(), config_url, password)
+            self.http_configurator.signals.configured.connect(self._collector_configured)
+            self.http_configurator.signals.offline.connect(self._handle_collector_offline)
+            self.http_configurator.signals.finished.connect(self._confirm_collector_update)
+            self.http_configurator.signals.unsupported.connect(
+                lambda message: self._configure_collector_with_browser(serial_numbers, password, config_url,
+                                                                       get_driver)
+            )
+            self.http_configurator.start(serial_numbers)
+
+    def _configure_collector_with_browser(self, serial_numbers, password, config_url, get_driver: Callable):
         if serial_numbers:
             a_collector = collector.CollectorConfigurator(get_driver(), config_url, password)
             a_collector.signals.configured.connect(self._collector_configured)
@@ -141,21 +235,48 @@ class MainWindow(QMainWindow):
                "<h4>Email:</h4>charlescognato@gmail.com</p>"
         QMessageBox.about(self, "About", text)
 
+    def on_menu_help_metrics_action_triggered(self):
+        # not modal, it can stay open next to a test, there is only ever one
+        if self.metrics_panel is None:
+            self.metrics_panel = MetricsPanel(self)
+        self.metrics_panel.show()
+        self.metrics_panel.raise_()
+        self.metrics_panel.activateWindow()
+
     def on_save_action_triggered(self):
         if result := spreadsheet.save_test_results(self.spreadsheet_path, self._sensor_log.get_test_results()):
             self.change_tracker.clear_change_flag()
+            self._unsaved_station_sets.pop(self.spreadsheet_path, None)
+            self.journal.compact(self.spreadsheet_path, self._sensor_log)
 
         QMessageBox.information(self, "LWTest - Save Data", result.message, QMessageBox.Ok)
 
+    def on_options_successive_testing_action_toggled(self, checked: bool):
+        if checked:
+            self._start_successive_testing()
+        else:
+            self._pause_successive_testing()
+
+    def on_next_set_action_triggered(self):
+        if self.set_queue and self._ok_to_discard_test_results():
+            self._load_station_set(self.set_queue.pop())
+
     def on_start_five_amp_test_action_triggered(self):
         self._sensor_selected_for_testing(self._sensor_view.currentItem())
 
+    def on_test_set_action_triggered(self):
+        if self.collector_configured:
+            self._test_set()
+        else:
+            self._check_collector_is_configured()
+
     def on_sensor_item_double_clicked(self, list_widget_item: QListWidgetItem):
         self._sensor_selected_for_testing(list_widget_item)
 
     def on_sensor_item_right_clicked(self, sensor: Sensor):
         if (action := self._get_sensor_context_menu_choice(sensor.remaining_time)) and "reset" in action.text():
             sensor.test_time_record.reset()
+            self.journal.record_time_reset(sensor.serial_number)
 
     def _get_sensor_context_menu_choice(self, remaining_time) -> Optional[QAction]:
         return self._make_sensor_context_menu(remaining_time).exec(QCursor.pos())
@@ -176,6 +297,7 @@ class MainWindow(QMainWindow):
 
     def _record_sensor_test_result(self, result):
         self._sensor_log.set_test_result(result.serial_number, result.result)
+        self.journal.record_result(result.serial_number, result.result)
 
     def _flag_unsaved_test_results(self):
         self.change_tracker.set_change_flag()
@@ -187,6 +309,7 @@ class MainWindow(QMainWindow):
         self._close_browser()
         self.collector_configured = True
         self.start_five_amp_action.setEnabled(True)
+        self.test_set_action.setEnabled(True)
 
     def _confirm_collector_update(self):
         # dialog = linewatchshared.interface.dialogs.serialupdate.SerialUpdateConfirmation(
@@ -206,15 +329,12 @@ class MainWindow(QMainWindow):
         return self.change_tracker.can_discard(self)
 
     def _close_browser(self):
-        if self.browser:
-            self.browser.minimize_window()
-            sleep(self.PAUSE_FOR_WEB_SERVER_BROWSER_COMMUNICATION)
-            self.browser.quit()
-            self.browser = None
+        # the session stays warm for the next configuration, leaving it on the page lets the save finish
+        self.browser = None
 
-    def _get_browser(self, driver_location: str):
+    def _get_browser(self):
         if self.browser is None:
-            self.browser = webdriver.Chrome(executable_path=driver_location)
+            self.browser = self.browser_session.get()
 
         return self.browser
 
@@ -223,6 +343,7 @@ class MainWindow(QMainWindow):
          all(map(lambda n: n.serial_number.isdigit(), serial_numbers)):
 
             self._sensor_log.append_all(serial_numbers)
+            self.journal.record_set(self.spreadsheet_path, self._sensor_log)
             self.collector_configuration_action.setEnabled(True)
 
             # auto configure the collector if applicable
@@ -243,12 +364,260 @@ class MainWindow(QMainWindow):
                 QMessageBox.information(self, dialog_title(), result_serial_numbers.message, QMessageBox.Ok)
                 return
 
-            self._sensor_log.append_all(result_serial_numbers())
-            self._serial_view_controller.populate_from_sensor_log(self._sensor_log)
-            self.collector_configuration_action.setEnabled(True)
-            self._auto_configure_collector_if_option_selected()
+            self._load_sensors(result_serial_numbers())
+
+    def _load_sensors(self, sensors):
+        self._sensor_log.append_all(sensors)
+        self.journal.record_set(self.spreadsheet_path, self._sensor_log)
+        self._serial_view_controller.populate_from_sensor_log(self._sensor_log)
+        self.collector_configuration_action.setEnabled(True)
+        self._auto_configure_collector_if_option_selected()
+
+        self.collector_configured = False
+
+    def _resume_session(self):
+        if not (session := journal.replay(self.journal.path)):
+            return
+
+        # sets that were being tested successively are tested again, their results so far kept
+        for queued in session.queued:
+            station_set = StationSet(os.path.basename(queued.source), queued.sensors, source=queued.source)
+            self._unsaved_station_sets[station_set.source] = station_set
+            self.set_queue.append(station_set)
+        self._update_queue_status()
+
+        if session.sensors is not None:
+            self._resume_set(session)
 
-            self.collector_configured = False
+        self.statusBar().showMessage("Resumed the previous session.")
+
+    def _resume_set(self, session: journal.Session):
+        self.spreadsheet_path = session.source or ""
+        self._sensor_log = session.sensors
+        self._serial_view_controller.populate_from_sensor_log(self._sensor_log)
+        for sensor in self._sensor_log:
+            if sensor.tested:
+                self._serial_view_controller.indicate_test_result(TestResult(sensor.serial_number, sensor.result))
+
+        self.collector_configuration_action.setEnabled(True)
+        if not session.saved:
+            self._flag_unsaved_test_results()
+            self._enable_save_action()
+
+    def _load_station_set(self, station_set):
+        self.spreadsheet_path = station_set.source
+        self._load_sensors(station_set.sensors)
+        self.setWindowTitle(f"{dialog_title()} - {station_set.name}")
+        self._update_queue_status()
+
+    def _import_batch(self, paths):
+        if not (spreadsheets := batchimport.expand_paths(paths)):
+            self._show_information_message("No spreadsheets were found in the dropped files.")
+            return
+
+        self._batch_imports = []
+        self.statusBar().showMessage(f"Importing {len(spreadsheets)} spreadsheets...")
+
+        def import_in_background():
+            batchimport.import_all(spreadsheets, on_imported=self.batch_signals.imported.emit)
+            self.batch_signals.finished.emit()
+
+        threading.Thread(target=import_in_background, daemon=True).start()
+
+    def _on_batch_file_imported(self, imported):
+        if imported.result and self._successive_testing():
+            # tested while the rest are still being imported
+            self._submit_station_set(make_station_set(imported.path, imported.result()))
+        else:
+            self._batch_imports.append(imported)
+        self.statusBar().showMessage(f"Imported {os.path.basename(imported.path)}")
+
+    def _on_batch_import_finished(self):
+        errors = []
+        for imported in sorted(self._batch_imports, key=lambda i: i.index):
+            if imported.result:
+                self.set_queue.append(make_station_set(imported.path, imported.result()))
+            else:
+                errors.append(f"{os.path.basename(imported.path)}: {imported.result.message}")
+
+        self._batch_imports = []
+        self._update_queue_status()
+
+        if errors:
+            self._show_information_message("These spreadsheets could not be imported:\n\n" + "\n".join(errors))
+
+        if self._successive_testing():
+            self._submit_queued_sets()
+        # start on the first set straight away if nothing is loaded
+        elif not self._sensor_log and self.set_queue:
+            self._load_station_set(self.set_queue.pop())
+
+    def _update_queue_status(self):
+        self.next_set_action.setEnabled(bool(self.set_queue) and not self._successive_testing())
+        message = f"{len(self.set_queue)} sets queued"
+        if self._sets_in_flight:
+            message += f", {self._sets_in_flight} in successive testing"
+        self.statusBar().showMessage(message)
+
+    def _successive_testing(self) -> bool:
+        return self.options_successive_testing_action.isChecked()
+
+    def _start_successive_testing(self):
+        """Tests the queued sets one after the other, and every set imported while the option is selected.
+
+        Each collector is configured with its next set as soon as it has tested one, and
+        results are saved in the background, so a station doesn't wait between sets.
+        """
+        if not self._ok_to_discard_test_results():
+            self.options_successive_testing_action.setChecked(False)
+            return
+
+        if self.orchestrator is None:
+            self.result_writer = ResultWriter(self._save_station_set,
+                                              on_saved=self.station_signals.saved.emit).start()
+            self.orchestrator = StationOrchestrator(self.collectors, configure=make_configure(self.browser_session),
+                                                    on_event=self._on_orchestrator_event)
+            self.orchestrator.start()
+
+        self._submit_queued_sets()
+        self._update_manual_actions()
+
+    def _pause_successive_testing(self):
+        # sets a collector has started on are finished, the rest go back to the queue
+        if self.orchestrator is not None:
+            for station_set in self.orchestrator.withdraw():
+                self._sets_in_flight -= 1
+                self.set_queue.append(station_set)
+
+        self._update_queue_status()
+        self._update_manual_actions()
+
+    def _stop_successive_testing(self):
+        """Cancels the running tests without blocking the window, 'station_signals.stopped' is emitted
+        once the collectors' workers are done and every finished set is saved.
+
+        The remaining test time of a cancelled set is journaled, it isn't saved to its workbook.
+        """
+        orchestrator, result_writer = self.orchestrator, self.result_writer
+        orchestrator.stop()
+
+        def wait_in_background():
+            orchestrator.wait()
+            result_writer.close()
+            self.station_signals.stopped.emit()
+
+        threading.Thread(target=wait_in_background, daemon=True).start()
+
+    def _on_successive_testing_stopped(self):
+        self.orchestrator = None
+        self.result_writer = None
+        if self._closing:
+            self.close()
+
+    def _submit_queued_sets(self):
+        while station_set := self.set_queue.pop():
+            self._submit_station_set(station_set)
+
+    def _submit_station_set(self, station_set: StationSet):
+        self._sets_in_flight += 1
+        station_set.attempts = 0
+        self.orchestrator.submit(station_set)
+        self._update_queue_status()
+
+    def _retry_station_set(self, station_set: StationSet):
+        if self.orchestrator is not None and self._successive_testing():
+            self.orchestrator.submit(station_set)
+        else:
+            self.set_queue.append(station_set)
+            self._set_left_successive_testing()
+
+    def _update_manual_actions(self):
+        # while sets are tested successively the collectors are theirs
+        idle = not (self._successive_testing() or self._sets_in_flight)
+        self.define_set_action.setEnabled(idle)
+        self.collector_configuration_action.setEnabled(idle)
+        self.start_five_amp_action.setEnabled(idle and self.collector_configured)
+        self.test_set_action.setEnabled(idle and self.collector_configured)
+        self.next_set_action.setEnabled(idle and bool(self.set_queue))
+
+    def _on_orchestrator_event(self, event: StationEvent):
+        # on the collector's worker, sets are journaled and their results queued for saving without
+        # waiting on the GUI, so a crash loses nothing of any set being tested
+        station_set = event.station_set
+        if event.kind == "configuring":
+            self.journal.record_set(station_set.source, station_set.sensors, successive=True)
+        elif event.kind == "configured":
+            for sensor in station_set.sensors:
+                if not sensor.tested and sensor.serial_number != constants.BLANK_SERIAL_NUMBER:
+                    self.journal.record_started(sensor, station_set.source)
+        elif event.kind == "result":
+            self.journal.record_result(event.payload.serial_number, event.payload.result, station_set.source)
+        elif event.kind == "finished":
+            self.result_writer.submit(station_set)
+        elif event.kind == "cancelled":
+            for sensor in station_set.sensors:
+                self.journal.record_interruption(sensor, station_set.source)
+        self.station_signals.event.emit(event)
+
+    def _on_station_event(self, event: StationEvent):
+        station_set = event.station_set
+        if event.kind == "configuring":
+            self.statusBar().showMessage(f"Configuring {event.collector.name} with {station_set.name}")
+        elif event.kind == "configured":
+            self._unsaved_station_sets[station_set.source] = station_set
+            self._show_station_set(station_set)
+            self.statusBar().showMessage(f"Testing {station_set.name} on {event.collector.name}")
+        elif event.kind == "result" and station_set.sensors is self._sensor_log:
+            self._serial_view_controller.indicate_test_result(event.payload)
+        elif event.kind in ("finished", "cancelled"):
+            self._set_left_successive_testing()
+        elif event.kind == "error":
+            self.logger.warning(f"{station_set.name} on {event.collector.name}: {event.payload}")
+            if self._successive_testing() and station_set.attempts < constants.CONFIGURE_ATTEMPTS:
+                QTimer.singleShot(constants.CONFIGURE_RETRY_DELAY * 1000, lambda: self._retry_station_set(station_set))
+                self.statusBar().showMessage(f"{station_set.name} was not tested, trying again in "
+                                             f"{constants.CONFIGURE_RETRY_DELAY} s: {event.payload}")
+                return
+
+            # left untested, it goes back to the queue to be tested by hand or when successive testing restarts
+            self.set_queue.append(station_set)
+            self._set_left_successive_testing()
+            self.statusBar().showMessage(f"{station_set.name} was not tested: {event.payload}")
+
+    def _set_left_successive_testing(self):
+        self._sets_in_flight -= 1
+        self._update_queue_status()
+        self._update_manual_actions()
+
+    def _show_station_set(self, station_set: StationSet):
+        self.spreadsheet_path = station_set.source
+        self._sensor_log = station_set.sensors
+        self._serial_view_controller.populate_from_sensor_log(self._sensor_log)
+        self.setWindowTitle(f"{dialog_title()} - {station_set.name}")
+        self.collector_configured = False
+
+    @staticmethod
+    def _save_station_set(station_set: StationSet) -> Result:
+        # on the result writer's thread
+        return spreadsheet.save_test_results(station_set.source, station_set.sensors.get_test_results())
+
+    def _on_station_set_saved(self, station_set: StationSet, result: Result):
+        if result:
+            self._unsaved_station_sets.pop(station_set.source, None)
+            self.statusBar().showMessage(f"Saved the results of {station_set.name}")
+            # compacting leaves only this set in the journal
+            if station_set.sensors is self._sensor_log and not (self._sets_in_flight or self._unsaved_station_sets):
+                self.journal.compact(station_set.source, station_set.sensors)
+            else:
+                self.journal.record_saved(station_set.source)
+            return
+
+        self.logger.error(f"Unable to save the results of {station_set.name}: {result.message}")
+        if station_set.sensors is self._sensor_log:
+            # still on screen, it can be saved by hand
+            self._flag_unsaved_test_results()
+            self._enable_save_action()
+        self._show_information_message(f"The results of {station_set.name} could not be saved:\n\n{result.message}")
 
     def _auto_configure_collector_if_option_selected(self):
         if self.options_auto_collector_configuration_action.isChecked():
@@ -261,10 +630,32 @@ class MainWindow(QMainWindow):
                                                                 "Do you want to continue?"):
                 return
 
-            td = FiveAmpTestDialog(self, sensor)
+            td = FiveAmpTestDialog(self, sensor, self.collectors.default.status_url)
             td.signals.testPassed.connect(self.on_test_dialog_finished)
             td.signals.testFailed.connect(self.on_test_dialog_finished)
+            self.journal.record_started(sensor)
             td.exec_()
+            self.journal.record_interruption(sensor)
+
+    def _test_set(self):
+        sensors = [sensor for sensor in self._sensor_log
+                   if not sensor.tested and sensor.serial_number != constants.BLANK_SERIAL_NUMBER]
+        if not sensors:
+            return
+
+        if any(sensor.failure for sensor in sensors) and \
+                not self._ask_yes_no_question("Some sensors failed previous sections of testing.\n" +
+                                              "Do you want to test them too?"):
+            sensors = [sensor for sensor in sensors if not sensor.failure]
+
+        td = SetTestDialog(self, sensors, self.collectors.default.status_url)
+        td.signals.testPassed.connect(self.on_test_dialog_finished)
+        td.signals.testFailed.connect(self.on_test_dialog_finished)
+        for sensor in sensors:
+            self.journal.record_started(sensor)
+        td.exec_()
+        for sensor in sensors:
+            self.journal.record_interruption(sensor)
 
     def _check_collector_is_configured(self):
         if not self.collector_configured:
@@ -280,7 +671,7 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, dialog_title(), message, QMessageBox.Ok)
 
     def _create_menus(self):
-        settings = QSettings()
+        settings = lab_settings.get_settings()
 
         toolbar = QToolBar("Toolbar")
         self.addToolBar(toolbar)
@@ -296,11 +687,15 @@ class MainWindow(QMainWindow):
                                                       "", self)
         self.save_results_action = QAction(QIcon(r"laboot/resources/images/menu_icons/save-01_48.png"),
                                            "", self)
+        self.next_set_action = QAction(QIcon(r"laboot/resources/images/drop_image-01_128.png"),
+                                       "", self)
         self.exit_action = QAction(QIcon(r"laboot/resources/images/menu_icons/exit-01_128.png"), "", self)
 
         # menu_tasks actions
         self.start_five_amp_action = QAction(QIcon(r"laboot/resources/images/menu_icons/bolt-01_48.png"),
                                              "", self)
+        self.test_set_action = QAction(QIcon(r"laboot/resources/images/menu_icons/run-01_32.png"),
+                                       "", self)
 
         # menu_options actions
         self.options_auto_collector_configuration_action = QAction("Auto Configure Collector", self)
@@ -308,6 +703,7 @@ class MainWindow(QMainWindow):
         self.options_headless_action = QAction("Headless mode", self)
 
         self.help_about_action = QAction(QIcon(r"laboot/resources/images/menu_icons/info-01_32.png"), "&About", self)
+        self.help_metrics_action = QAction("&Metrics", self)
 
         # ----- configure options -----
 
@@ -320,50 +716,60 @@ class MainWindow(QMainWindow):
         self.start_five_amp_action.setEnabled(False)
         self.start_five_amp_action.setStatusTip("Start 5 Amp test.")
 
+        self.test_set_action.setEnabled(False)
+        self.test_set_action.setStatusTip("Start 5 Amp test for all untested sensors at once.")
+
         self.save_results_action.setEnabled(False)
         self.save_results_action.setStatusTip("Save test results.")
 
+        self.next_set_action.setEnabled(False)
+        self.next_set_action.setStatusTip("Load the next queued set.")
+
         self.exit_action.setStatusTip("Exit the application.")
 
         # menu_options
         self.options_auto_collector_configuration_action.setCheckable(True)
-        if settings.value("ui/menus/options/autoconfigcollector", "False") == "True":
+        if settings.auto_configure_collector:
             self.options_auto_collector_configuration_action.setChecked(True)
         self.options_auto_collector_configuration_action.setStatusTip(
             "Automatically configures collector on serial number import.")
 
         self.options_successive_testing_action.setCheckable(True)
-        self.options_successive_testing_action.setChecked(False)
-        self.options_successive_testing_action.setStatusTip("Test units one after the other pausing in between.")
-        self.options_successive_testing_action.setEnabled(False)
+        self.options_successive_testing_action.setChecked(settings.successive_testing)
+        self.options_successive_testing_action.setStatusTip(
+            "Configures and tests queued sets one after the other, saving results as each set finishes.")
 
         self.options_headless_action.setCheckable(True)
-        self.options_headless_action.setChecked(False)
+        self.options_headless_action.setChecked(self.browser_session.headless)
         self.options_headless_action.setStatusTip("In headless mode, the get_driver window will not appear.")
-        settings.setValue("ui/menus/options/headless", False)
 
         # menu_help
         self.help_about_action.setStatusTip("Information about Low Amperage Boot.")
+        self.help_metrics_action.setStatusTip("Time taken by the collector, Chrome and spreadsheets.")
 
         # ----- configure triggers -----
         self.define_set_action.triggered.connect(self.on_define_set_action_triggered)
 
         self.collector_configuration_action.triggered.connect(
             lambda: self.on_configure_collector_action_triggered(self._sensor_log.get_serial_numbers_as_tuple(),
-                                                                 QSettings().value('main/config_password'),
-                                                                 constants.URL_CONFIGURATION,
-                                                                 lambda: self._get_browser(
-                                                                     constants.CHROMEDRIVER_PATH
-                                                                 ))
+                                                                 self.collectors.default.password,
+                                                                 self.collectors.default.config_url,
+                                                                 self._get_browser)
         )
 
         self.start_five_amp_action.triggered.connect(self.on_start_five_amp_test_action_triggered)
+        self.test_set_action.triggered.connect(self.on_test_set_action_triggered)
         self.save_results_action.triggered.connect(self.on_save_action_triggered)
+        self.next_set_action.triggered.connect(self.on_next_set_action_triggered)
         self.exit_action.triggered.connect(self._close)
 
-        self.options_headless_action.toggled.connect(lambda s: settings.setValue("ui/menus/options/headless", s))
+        self.options_auto_collector_configuration_action.toggled.connect(self._save_ui_state)
+        self.options_successive_testing_action.toggled.connect(self._save_ui_state)
+        self.options_successive_testing_action.toggled.connect(self.on_options_successive_testing_action_toggled)
+        self.options_headless_action.toggled.connect(self._save_ui_state)
 
         self.help_about_action.triggered.connect(self.on_menu_help_about_action_triggered)
+        self.help_metrics_action.triggered.connect(self.on_menu_help_metrics_action_triggered)
 
         # ----- add to menus -----
 
@@ -374,12 +780,15 @@ class MainWindow(QMainWindow):
 
         # menu_help
         self.menu_help.addAction(self.help_about_action)
+        self.menu_help.addAction(self.help_metrics_action)
 
         # set up toolbar
         toolbar.addAction(self.define_set_action)
+        toolbar.addAction(self.next_set_action)
         toolbar.addAction(self.collector_configuration_action)
         toolbar.addSeparator()
         toolbar.addAction(self.start_five_amp_action)
+        toolbar.addAction(self.test_set_action)
         toolbar.addSeparator()
         toolbar.addAction(self.save_results_action)
         toolbar.addAction(self.exit_action)
@@ -399,10 +808,17 @@ class MainWindow(QMainWindow):
                                     QMessageBox.Yes | QMessageBox.No,
                                     QMessageBox.No) == QMessageBox.Yes
 
-    def _save_ui_state(self, settings_repository):
-        settings_repository.setValue("ui/menus/options/autoconfigcollector",
-                                     str(self.options_auto_collector_configuration_action.isChecked())
-                                     )
+    def _save_ui_state(self):
+        # only the options that changed are written
+        lab_settings.set_values({
+            "ui/menus/options/autoconfigcollector": self.options_auto_collector_configuration_action.isChecked(),
+            "ui/menus/options/successivetesting": self.options_successive_testing_action.isChecked(),
+            "ui/menus/options/headless": self.options_headless_action.isChecked(),
+        })
+
+    def _on_settings_changed(self, settings: lab_settings.Settings, keys: tuple):
+        if "ui/menus/options/headless" in keys:
+            self.browser_session.set_headless(settings.headless)
 
     def _close(self):
         self.close()
@@ -0,0 +1,292 @@
+# metrics.py
+"""Counters and latency histograms for the paths that decide how fast a station runs.
+
+Modem status fetches and parsing, browser steps, form submissions and workbook
+reads and writes are timed here, so the slow part at a station, the collector,
+the network, Chrome or openpyxl, can be told apart. Disabled, which is the
+default, timing a call costs one attribute lookup.
+
+    metrics/enabled=true
+    metrics/export_path=metrics.prom      # or metrics.json
+    metrics/export_interval=15
+
+Only this process is measured, batch import's worker processes are not.
+"""
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+# seconds, from a fast local page up to a slow Chrome start
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DESCRIPTIONS = {
+    "collector_get_seconds": "Time for the collector to answer a page request, modem status included.",
+    "collector_post_seconds": "Time for the collector to answer a form submission.",
+    "collector_not_modified_total": "Page requests answered with 304 Not Modified.",
+    "collector_errors_total": "Page requests that failed or returned an error status.",
+    "poll_failures_total": "Modem status polls that failed.",
+    "modem_status_parse_seconds": "Time to index the modem status page.",
+    "browser_start_seconds": "Time to start Chrome.",
+    "browser_page_load_seconds": "Time for Chrome to load the configuration page.",
+    "dom_search_seconds": "Time to find elements on the configuration page in Chrome.",
+    "browser_submit_seconds": "Time to enter the password and save the configuration in Chrome.",
+    "http_submit_seconds": "Time to save the configuration over HTTP.",
+    "workbook_load_seconds": "Time for openpyxl to load a workbook.",
+    "workbook_patch_seconds": "Time to write results into a workbook.",
+    "collector_idle_seconds": "Time a collector waited between finishing a set and starting on the next.",
+    "result_save_wait_seconds": "Time a finished set waited for its results to be written.",
+}
+
+
+class Counter:
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self.value}
+
+
+class Histogram:
+    """Counts observations into fixed buckets, as a Prometheus histogram does."""
+
+    def __init__(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        # one more than there are buckets, for observations above the last one
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates the 'q' quantile as the upper bound of the bucket it falls in."""
+        with self._lock:
+            counts, count, largest = list(self._counts), self.count, self.max
+        if not count:
+            return None
+
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets + (largest,), counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, largest)
+
+        return largest
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, total = [], 0
+            for bucket_count in self._counts[:-1]:
+                total += bucket_count
+                cumulative.append(total)
+
+            return {"type": "histogram", "count": self.count, "sum": self.sum, "max": self.max,
+                    "buckets": dict(zip((str(bound) for bound in self.buckets), cumulative))}
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Registry:
+    """The metrics of the application by name, created on first use."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get(name, lambda: Counter(name, description or DESCRIPTIONS.get(name, "")))
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, description or DESCRIPTIONS.get(name, ""), buckets))
+
+    def inc(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counter(name).inc(amount)
+
+    def observe(self, name: str, value: float):
+        if self.enabled:
+            self.histogram(name).observe(value)
+
+    def time(self, name: str):
+        """A context manager timing its block into histogram 'name'."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def metrics(self) -> list:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def snapshot(self) -> dict:
+        return {metric.name: metric.snapshot() for metric in self.metrics()}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for metric in self.metrics():
+            snapshot = metric.snapshot()
+            if metric.description:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {snapshot['type']}")
+
+            if snapshot["type"] == "counter":
+                lines.append(f"{metric.name} {snapshot['value']}")
+                continue
+
+            for bound, cumulative in snapshot["buckets"].items():
+                lines.append(f'{metric.name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric.name}_bucket{{le="+Inf"}} {snapshot["count"]}')
+            lines.append(f"{metric.name}_sum {snapshot['sum']}")
+            lines.append(f"{metric.name}_count {snapshot['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def _get(self, name: str, create: Callable[[], object]):
+        if (metric := self._metrics.get(name)) is None:
+            with self._lock:
+                if (metric := self._metrics.get(name)) is None:
+                    metric = self._metrics[name] = create()
+
+        return metric
+
+
+class MetricsExporter:
+    """Writes the registry to 'path' every 'interval' seconds.
+
+    A path ending in .json gets a JSON snapshot, anything else the Prometheus text
+    format, for node_exporter's textfile collector. The file is replaced in one
+    step so a reader never sees half of it.
+    """
+
+    def __init__(self, registry: Registry, path: str, interval: float = 15.0):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+    def start(self) -> "MetricsExporter":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.export()
+
+    def export(self):
+        if self.path.endswith(".json"):
+            text = json.dumps({"time": time.time(), "metrics": self.registry.snapshot()}, indent=1)
+        else:
+            text = self.registry.to_prometheus()
+
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w") as out_f:
+                out_f.write(text)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Unable to export metrics to '{self.path}': {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export()
+
+
+_registry = Registry()
+_exporter: Optional[MetricsExporter] = None
+
+
+def get_registry() -> Registry:
+    return _registry
+
+
+def configure(settings):
+    """Enables metrics and starts exporting them as the settings say."""
+    global _exporter
+    _registry.enabled = str(settings.value("metrics/enabled", "false")).lower() == "true"
+
+    if _registry.enabled and (path := settings.value("metrics/export_path")) and _exporter is None:
+        _exporter = MetricsExporter(_registry, path, float(settings.value("metrics/export_interval", 15))).start()
+
+
+def shutdown():
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+
+def inc(name: str, amount: int = 1):
+    _registry.inc(name, amount)
+
+
+def observe(name: str, value: float):
+    _registry.observe(name, value)
+
+
+def time_block(name: str):
+    return _registry.time(name)
+
+
+def timed(name: str):
+    """Decorates a function to time every call into histogram 'name'."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _registry.enabled:
+                return function(*args, **kwargs)
+            with _Timer(_registry.histogram(name)):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,82 @@
+# modemstatus.py
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, Set, Union
+
+from laboot import metrics
+
+link_pattern = re.compile(r"\s*\d{7}\s*\d{7}\s*\d{7}\s*-?\d{1,2}")
+serial_pattern = re.compile(r"\s*\d{7}")
+
+# a modem line, the peers and signal strength are only present once the modem has linked
+_modem_pattern = re.compile(r"\s*(\d{7})(?:\s*(\d{7})\s*(\d{7})\s*(-?\d{1,2}))?")
+
+ModemStatus = namedtuple("ModemStatus", "serial_number linked peers rssi")
+
+
+@metrics.timed("modem_status_parse_seconds")
+def index(lines: Union[str, Iterable[str]], serial_numbers: Iterable[str] = None) -> Dict[str, ModemStatus]:
+    """Indexes the modem status page by serial number in a single pass.
+
+    Parameters
+    ----------
+    lines: str or Iterable[str]
+        the modem status page, either as text or as a stream of lines
+
+    serial_numbers: Iterable[str]
+        when given, only these serial numbers are indexed and reading stops
+        as soon as all of them have been found linked
+
+    A modem can be listed more than once, its first linked line wins over any
+    line without a link.
+
+    Returns
+    -------
+        dict
+            serial number -> ModemStatus(serial_number, linked, peers, rssi)
+            peers is a tuple of the two linked serial numbers and rssi an int,
+            both are None if the modem has not linked.
+    """
+    if isinstance(lines, str):
+        lines = lines.split('\n')
+
+    wanted = set(serial_numbers) if serial_numbers is not None else None
+    if wanted is not None and not wanted:
+        return {}
+
+    statuses = {}
+    linked = 0
+    for line in lines:
+        if not (match := _modem_pattern.match(line)):
+            continue
+
+        serial_number, peer_1, peer_2, rssi = match.groups()
+        if wanted is not None and serial_number not in wanted:
+            continue
+
+        if (status := statuses.get(serial_number)) is not None and (status.linked or rssi is None):
+            continue
+
+        if rssi is None:
+            statuses[serial_number] = ModemStatus(serial_number, False, None, None)
+            continue
+
+        statuses[serial_number] = ModemStatus(serial_number, True, (peer_1, peer_2), int(rssi))
+        linked += 1
+        if wanted is not None and linked == len(wanted):
+            break
+
+    return statuses
+
+
+def find_linked_serial_numbers(lines: Union[str, Iterable[str]], serial_numbers: Iterable[str],
+                               recorder=None) -> Set[str]:
+    """Returns the serial numbers in 'serial_numbers' that are linked on the modem status page.
+
+    When given, 'recorder' (a linkcapture.LinkRecorder) is passed the status of every sensor found.
+    """
+    statuses = index(lines, serial_numbers)
+    if recorder is not None:
+        recorder.record(statuses.values())
+
+    return {serial_number for serial_number, status in statuses.items() if status.linked}
@@ -0,0 +1,244 @@
+# orchestrator.py
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from laboot import constants, linkcapture, metrics, testengine
+from laboot.config.collector.httpconfig import HttpCollectorConfigurator, UnrecognizedForm
+from laboot.config.collector.registry import Collector, CollectorRegistry
+from laboot.linkpolicy import LinkCheckPolicy, LinkHistory
+from laboot.modemstatus import find_linked_serial_numbers
+from laboot.sensor import SensorLog
+from laboot.testengine import SetTestEngine, TestResult
+from laboot.utilities import http
+from laboot.utilities.returns import Result
+
+# kind is one of "configuring", "configured", "result", "finished", "cancelled" or "error", a set is
+# cancelled when the orchestrator is stopped before all its tests are done
+StationEvent = namedtuple("StationEvent", "kind station_set collector payload")
+
+
+class StationSet:
+    """A set of sensors waiting for, or going through, the 5 Amp test."""
+
+    def __init__(self, name: str, sensors: SensorLog, source: str = None):
+        self.name = name
+        self.sensors = sensors
+        self.source = source
+        self.collector = None
+        # how many times a collector has been configured with it, failed configurations included
+        self.attempts = 0
+        self.results: List[TestResult] = []
+
+    def __repr__(self):
+        return f"StationSet('{self.name}', {self.sensors.get_serial_numbers_as_tuple()})"
+
+
+def configure_over_http(collector: Collector, serial_numbers: tuple) -> Result:
+    return HttpCollectorConfigurator(http.get_client(), collector.config_url,
+                                     collector.password).configure_serial_numbers(serial_numbers)
+
+
+def make_configure(browser_session=None) -> Callable[[Collector, tuple], Result]:
+    """Returns a configure function that posts the form and, if the form isn't recognized,
+    falls back to the Selenium configurator using 'browser_session' one collector at a time."""
+    browser_lock = threading.Lock()
+
+    def configure(collector: Collector, serial_numbers: tuple) -> Result:
+        result = configure_over_http(collector, serial_numbers)
+        if result or browser_session is None or not isinstance(result.exception, UnrecognizedForm):
+            return result
+
+        from laboot.config.collector.collector import CollectorConfigurator
+
+        outcome = []
+        with browser_lock:
+            configurator = CollectorConfigurator(browser_session.get(), collector.config_url, collector.password)
+            configurator.signals.configured.connect(lambda: outcome.append(Result(True, serial_numbers)))
+            configurator.signals.offline.connect(lambda message: outcome.append(Result(False, None, message)))
+            configurator.configure_serial_numbers(serial_numbers)
+
+        return outcome[0] if outcome else Result(False, None, message="The collector was not configured.")
+
+    return configure
+
+
+def find_linked_over_http(collector: Collector, serial_numbers: Tuple[str]) -> Set[str]:
+    return find_linked_serial_numbers(http.get_client().iter_lines(collector.status_url), serial_numbers,
+                                      linkcapture.get_recorder())
+
+
+def make_find_linked(recorder: Optional[linkcapture.LinkRecorder]) -> Callable[[Collector, Tuple[str]], Set[str]]:
+    """Returns a find_linked function that records its polls with 'recorder' instead of the session's."""
+    def find_linked(collector: Collector, serial_numbers: Tuple[str]) -> Set[str]:
+        return find_linked_serial_numbers(http.get_client().iter_lines(collector.status_url), serial_numbers,
+                                          recorder)
+
+    return find_linked
+
+
+class StationOrchestrator:
+    """Hands queued sets to free collectors, configuring and testing them in parallel.
+
+    Each collector of the registry gets a worker on the pool. A worker takes the next
+    queued set, configures its collector with it, runs the 5 Amp test of the whole set
+    and then takes the next set, so throughput grows with the number of collectors.
+    Progress is reported through 'on_event', which is called on the worker threads.
+
+    Tests run on 'clock' and learn link times into 'link_history', the shared
+    history when not given.
+    """
+
+    def __init__(self, registry: CollectorRegistry,
+                 configure: Callable[[Collector, tuple], Result] = configure_over_http,
+                 find_linked: Callable[[Collector, Tuple[str]], Set[str]] = find_linked_over_http,
+                 on_event: Callable[[StationEvent], None] = None,
+                 link_check_time: int = constants.LINK_CHECK_TIME,
+                 clock: Callable[[], float] = time.monotonic, link_history: LinkHistory = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+        self.link_check_time = link_check_time
+        self.clock = clock
+        self.link_history = link_history
+
+        self._configure = configure
+        self._find_linked = find_linked
+        self._on_event = on_event or (lambda event: None)
+
+        self._sets = queue.Queue()
+        self._closed = threading.Event()
+        self._stop = threading.Event()
+        self._pool = None
+        self._futures = []
+        # collector name -> when it finished its last set, for the idle time between sets
+        self._finished_at: Dict[str, float] = {}
+
+    def submit(self, station_set: StationSet):
+        self._sets.put(station_set)
+
+    def withdraw(self) -> List[StationSet]:
+        """Takes back the sets no collector has started on, in the order they were submitted."""
+        withdrawn = []
+        while True:
+            try:
+                withdrawn.append(self._sets.get_nowait())
+            except queue.Empty:
+                return withdrawn
+            self._sets.task_done()
+
+    def start(self):
+        self._pool = ThreadPoolExecutor(max_workers=len(self.registry), thread_name_prefix="collector")
+        self._futures = [self._pool.submit(self._serve, collector) for collector in self.registry]
+
+    def close(self):
+        """No more sets will be submitted, workers exit once the queue is empty."""
+        self._closed.set()
+
+    def stop(self):
+        """Cancels running tests, their remaining test time is recorded on the sensors."""
+        self._stop.set()
+        self._closed.set()
+
+    def wait(self):
+        for future in self._futures:
+            future.result()
+        if self._pool:
+            self._pool.shutdown()
+
+    def _serve(self, collector: Collector):
+        while not self._stop.is_set():
+            try:
+                station_set = self._sets.get(timeout=0.5)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                continue
+
+            if not self.registry.acquire(collector.name):
+                # somebody else is using this collector, leave the set for another worker
+                self._sets.put(station_set)
+                self._stop.wait(1)
+                continue
+
+            if (finished_at := self._finished_at.get(collector.name)) is not None:
+                metrics.observe("collector_idle_seconds", time.monotonic() - finished_at)
+
+            try:
+                self._process(collector, station_set)
+            except Exception as e:
+                self.logger.exception(f"Unexpected error processing {station_set} on {collector.name}")
+                self._emit("error", station_set, collector, str(e))
+            finally:
+                self._finished_at[collector.name] = time.monotonic()
+                self.registry.release(collector)
+                self._sets.task_done()
+
+    def _process(self, collector: Collector, station_set: StationSet):
+        station_set.collector = collector
+        station_set.attempts += 1
+        serial_numbers = station_set.sensors.get_serial_numbers_as_tuple()
+
+        self._emit("configuring", station_set, collector)
+        if not (result := self._configure(collector, serial_numbers)):
+            self._emit("error", station_set, collector, result.message)
+            return
+        self._emit("configured", station_set, collector)
+
+        engine = SetTestEngine(station_set.sensors, self.link_check_time, clock=self.clock,
+                               policy=LinkCheckPolicy(self.link_history, interval=self.link_check_time))
+
+        def on_result(test_result: TestResult):
+            station_set.sensors.set_test_result(test_result.serial_number, test_result.result)
+            self._emit("result", station_set, collector, test_result)
+
+        station_set.results = testengine.run(engine,
+                                             lambda serials: self._find_linked(collector, serials),
+                                             on_result=on_result, stop=self._stop)
+        self._emit("finished" if engine.is_finished() else "cancelled", station_set, collector, station_set.results)
+
+    def _emit(self, kind: str, station_set: StationSet, collector: Collector, payload=None):
+        self._on_event(StationEvent(kind, station_set, collector, payload))
+
+
+class ResultWriter:
+    """Saves the results of finished sets on a thread of its own.
+
+    A collector takes its next set as soon as it has tested one instead of waiting
+    on the workbook being written. Sets are saved one at a time, in the order they
+    finished, with 'save' and the outcome reported to 'on_saved', on the writer's thread.
+    """
+
+    def __init__(self, save: Callable[[StationSet], Result],
+                 on_saved: Callable[[StationSet, Result], None] = None):
+        self.logger = logging.getLogger(__name__)
+        self._save = save
+        self._on_saved = on_saved or (lambda station_set, result: None)
+        self._sets = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="results", daemon=True)
+
+    def start(self) -> "ResultWriter":
+        self._thread.start()
+        return self
+
+    def submit(self, station_set: StationSet):
+        self._sets.put((time.monotonic(), station_set))
+
+    def close(self):
+        """Returns once every set submitted so far has been saved."""
+        self._sets.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while (item := self._sets.get()) is not None:
+            submitted_at, station_set = item
+            metrics.observe("result_save_wait_seconds", time.monotonic() - submitted_at)
+            try:
+                result = self._save(station_set)
+            except Exception as e:
+                self.logger.exception(f"Unexpected error saving the results of {station_set}")
+                result = Result(False, None, message=str(e))
+            self._on_saved(station_set, result)
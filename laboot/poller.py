@@ -0,0 +1,97 @@
+# poller.py
+import logging
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from laboot import metrics
+from laboot.signals import PollSignals
+from laboot.utilities import http
+
+# threads that were stopped while a request was still in flight, kept alive until they finish
+_retired = set()
+
+
+def _fetch(url: str) -> str:
+    return http.get_client().get_text(url)
+
+
+class PollWorker(QObject):
+    """Fetches and parses a page on the poller thread."""
+
+    def __init__(self, fetch: Callable[[str], str] = _fetch):
+        super().__init__()
+        self.signals = PollSignals()
+        self._fetch = fetch
+
+    @pyqtSlot(str, object)
+    def poll(self, url: str, parse: Optional[Callable[[str], Any]]):
+        try:
+            page = self._fetch(url)
+            result = parse(page) if parse else page
+        except Exception as e:
+            metrics.inc("poll_failures_total")
+            self.signals.failed.emit(url, str(e))
+            return
+
+        self.signals.polled.emit(url, result)
+
+
+class BackgroundPoller(QObject):
+    """Polls a page on a background thread so the GUI thread never waits on network I/O.
+
+    Results are delivered on the GUI thread through 'signals.polled' and 'signals.failed'.
+    Only one request is in flight at a time, 'poll' returns False while one is pending.
+    """
+
+    _request = pyqtSignal(str, object)
+
+    def __init__(self, parent=None, fetch: Callable[[str], str] = _fetch):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.signals = PollSignals()
+        self.busy = False
+        self._stopped = False
+
+        self._thread = QThread()
+        self._worker = PollWorker(fetch)
+        self._worker.moveToThread(self._thread)
+
+        self._request.connect(self._worker.poll)
+        self._worker.signals.polled.connect(self._on_polled)
+        self._worker.signals.failed.connect(self._on_failed)
+
+        self._thread.start()
+
+    def poll(self, url: str, parse: Optional[Callable[[str], Any]] = None) -> bool:
+        """Requests 'url' on the background thread, 'parse' is also called on that thread."""
+        if self.busy or self._stopped:
+            return False
+
+        self.busy = True
+        self._request.emit(url, parse)
+
+        return True
+
+    def stop(self):
+        if self._stopped:
+            return
+
+        self._stopped = True
+        self._thread.quit()
+
+        if self._thread.isRunning():
+            retiring = (self._thread, self._worker)
+            _retired.add(retiring)
+            self._thread.finished.connect(lambda: _retired.discard(retiring))
+
+    def _on_polled(self, url: str, result):
+        self.busy = False
+        if not self._stopped:
+            self.signals.polled.emit(url, result)
+
+    def _on_failed(self, url: str, message: str):
+        self.busy = False
+        self.logger.warning(f"Unable to poll {url}: {message}")
+        if not self._stopped:
+            self.signals.failed.emit(url, message)
@@ -0,0 +1,105 @@
+# rules.py
+import json
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from laboot import constants
+
+# a sensor passes a rule when the test holds for its cell:
+#   equals        str(cell).lower() == str(value).lower()
+#   greater_than  float(cell) > value
+#   less_than     float(cell) < value
+#   within        abs(float(reference) - float(cell)) <= value
+Rule = namedtuple("Rule", "name cells test value reference")
+
+TESTS = ("equals", "greater_than", "less_than", "within")
+
+def make_rules(definitions: Sequence[dict]) -> List[Rule]:
+    """Builds rules from their definitions, cell groups and references are names in constants."""
+    rules = []
+    for definition in definitions:
+        if definition["test"] not in TESTS:
+            raise ValueError(f"Rule '{definition['name']}' has an unknown test '{definition['test']}'.")
+
+        reference = definition.get("reference")
+        rules.append(Rule(definition["name"],
+                          tuple(getattr(constants, definition["cells"])),
+                          definition["test"],
+                          definition["value"],
+                          getattr(constants, reference) if reference else None))
+
+    return rules
+
+
+def load_rules(path: str) -> List[Rule]:
+    with open(path) as in_f:
+        return make_rules(json.load(in_f))
+
+
+def cells_used(rules: Sequence[Rule]) -> List[str]:
+    """Every cell the rules look at."""
+    cells = []
+    for rule in rules:
+        cells.extend(rule.cells)
+        if rule.reference:
+            cells.append(rule.reference)
+
+    return list(dict.fromkeys(cells))
+
+
+def _numbers(values: List) -> np.ndarray:
+    numbers = np.full(len(values), np.nan)
+    for index, value in enumerate(values):
+        try:
+            numbers[index] = float(value)
+        except (TypeError, ValueError):
+            pass
+
+    return numbers
+
+
+def evaluate(rules: Sequence[Rule], workbooks: Sequence[Dict[str, object]]) -> List[List[Optional[str]]]:
+    """Classifies every sensor of every workbook in one pass per rule.
+
+    Parameters
+    ----------
+    rules: Sequence[Rule]
+        the rules, a sensor is reported against the first rule it fails
+
+    workbooks: Sequence[dict]
+        the cell -> value mapping of each workbook
+
+    Returns
+    -------
+        list
+            for each workbook, the name of the failed rule for each sensor position or None if it passed
+    """
+    if not workbooks or not rules:
+        return [[None] * len(constants.RSSI_RESULTS) for _ in workbooks]
+
+    positions = len(rules[0].cells)
+    failed = np.full((len(workbooks), positions), -1)
+
+    for rule_index, rule in enumerate(rules):
+        # workbook after workbook, so the reshape below gives one row per workbook and one column per sensor position
+        values = [workbook.get(cell) for workbook in workbooks for cell in rule.cells]
+
+        if rule.test == "equals":
+            text = np.char.lower(np.array([str(value) for value in values], dtype=str))
+            passed = text == str(rule.value).lower()
+        else:
+            numbers = _numbers(values)
+            if rule.test == "greater_than":
+                passed = numbers > rule.value
+            elif rule.test == "less_than":
+                passed = numbers < rule.value
+            else:
+                references = np.repeat(_numbers([workbook.get(rule.reference) for workbook in workbooks]), positions)
+                passed = np.abs(references - numbers) <= rule.value
+
+        newly_failed = ~passed.reshape(len(workbooks), positions) & (failed == -1)
+        failed[newly_failed] = rule_index
+
+    return [[rules[index].name if index >= 0 else None for index in row] for row in failed.tolist()]
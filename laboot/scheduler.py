@@ -0,0 +1,154 @@
+# scheduler.py
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class Deadline:
+    """A callback waiting in a scheduler, cancel it to drop the callback."""
+
+    __slots__ = ("when", "callback", "cancelled")
+
+    def __init__(self, when: float, callback: Callable[[], None]):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DeadlineScheduler:
+    """Runs callbacks at deadlines on a monotonic clock, kept in a min-heap.
+
+    Nothing happens between deadlines, so waiting on many tests costs no more than
+    waiting on one. The scheduler does not wait itself, whoever drives it sleeps for
+    'time_until_next' and then calls 'run_due'.
+
+    Parameters
+    ----------
+    clock: Callable
+        returns the current time in seconds, it must never go backwards
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.logger = logging.getLogger(__name__)
+        self.clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(1 for _, _, deadline in self._heap if not deadline.cancelled)
+
+    def call_at(self, when: float, callback: Callable[[], None]) -> Deadline:
+        deadline = Deadline(when, callback)
+        with self._lock:
+            # the sequence number keeps callbacks due at the same time in the order they were added
+            heapq.heappush(self._heap, (when, next(self._sequence), deadline))
+        self._scheduled()
+
+        return deadline
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> Deadline:
+        return self.call_at(self.clock() + delay, callback)
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def time_until_next(self) -> Optional[float]:
+        if (when := self.next_deadline()) is None:
+            return None
+        return max(0.0, when - self.clock())
+
+    def run_due(self) -> int:
+        """Runs every callback whose deadline has passed, returns how many ran."""
+        ran = 0
+        while True:
+            with self._lock:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0][0] > self.clock():
+                    break
+                _, _, deadline = heapq.heappop(self._heap)
+
+            try:
+                deadline.callback()
+            except Exception:
+                self.logger.exception("Scheduled callback failed.")
+            ran += 1
+
+        self._scheduled()
+        return ran
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    def _scheduled(self):
+        """Called when the next deadline may have changed."""
+
+
+class QtDeadlineScheduler(QObject, DeadlineScheduler):
+    """A DeadlineScheduler driven by the Qt event loop with a single timer.
+
+    The timer is armed for the next deadline only, so all dialogs under test share
+    one wake up per deadline instead of each ticking every second.
+    """
+
+    def __init__(self, parent: QObject = None, clock: Callable[[], float] = time.monotonic):
+        QObject.__init__(self, parent)
+        DeadlineScheduler.__init__(self, clock)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.run_due)
+
+    def _scheduled(self):
+        if (wait := self.time_until_next()) is None:
+            self._timer.stop()
+            return
+
+        # round up, waking a millisecond early would find nothing due
+        self._timer.start(math.ceil(wait * 1000))
+
+
+_scheduler: Optional[QtDeadlineScheduler] = None
+
+
+def get_scheduler() -> QtDeadlineScheduler:
+    """The scheduler shared by the GUI thread, create it once the QApplication exists."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = QtDeadlineScheduler()
+
+    return _scheduler
+
+
+class CompressedClock:
+    """A monotonic clock running 'speed' times faster than real time, for simulations and benchmarks."""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self._start = time.monotonic()
+
+    def __call__(self) -> float:
+        return self._start + (time.monotonic() - self._start) * self.speed
+
+
+def real_seconds(clock: Callable[[], float], seconds: Optional[float]) -> Optional[float]:
+    """How long 'seconds' on 'clock' takes in real time."""
+    return seconds if seconds is None else seconds / getattr(clock, "speed", 1)
+
+
+def seconds_left(deadline: float, now: float) -> int:
+    """Whole seconds until 'deadline', as shown to the operator."""
+    return max(0, math.ceil(deadline - now))
@@ -1,18 +1,25 @@
 # sensor.py
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from laboot import constants
 from laboot.utilities.time import TestTimeRecord
 
+NOT_TESTED = "Not Tested"
+
 
 class Sensor:
-    def __init__(self, line_position, serial_number, prior_failure: bool = False):
+    # sessions can hold thousands of sensors, __slots__ keeps each one small
+    __slots__ = ("position", "serial_number", "_prior_failure", "failure_reason", "tested", "result",
+                 "_test_time_record")
+
+    def __init__(self, line_position, serial_number, prior_failure: bool = False, failure_reason: str = None):
         self.position = line_position
         self.serial_number = serial_number
         self._prior_failure = prior_failure
+        self.failure_reason = failure_reason
         self.tested = False
-        self.result = "Not Tested"
-        self.test_time_record = TestTimeRecord(constants.TEST_TIME)
+        self.result = NOT_TESTED
+        self._test_time_record = None
 
     @property
     def failure(self) -> bool:
@@ -22,59 +29,86 @@ class Sensor:
     def remaining_time(self):
         return self.test_time_record.remaining_time
 
+    @property
+    def test_time_record(self) -> TestTimeRecord:
+        # most sensors are never interrupted, only create a record when one is needed
+        if self._test_time_record is None:
+            self._test_time_record = TestTimeRecord(constants.TEST_TIME)
+        return self._test_time_record
+
     def set_test_time(self, test_time_record: TestTimeRecord):
-        self.test_time_record = test_time_record
+        self._test_time_record = test_time_record
 
 
 class SensorLog:
+    """The sensors of a set, indexed by line position and by serial number.
+
+    Blank positions share a serial number, looking one up by serial number
+    returns the first of them, as it always has.
+    """
+
     def __init__(self):
-        self.log = dict()
+        self._by_position: Dict[int, Sensor] = {}
+        self._by_serial_number: Dict[str, Sensor] = {}
 
     def __len__(self):
-        return len(self.log)
+        return len(self._by_position)
 
     def __iter__(self):
-        return iter(self.log.values())
+        return iter(self._by_position.values())
 
     def append(self, sensor: Sensor):
-        self.log[(sensor.position, sensor.serial_number, sensor.failure)] = sensor
+        if (replaced := self._by_position.get(sensor.position)) is not None:
+            self._unindex(replaced)
+
+        self._by_position[sensor.position] = sensor
+        self._by_serial_number.setdefault(sensor.serial_number, sensor)
 
-    def append_all(self, sensors):
+    def append_all(self, sensors: Iterable):
         self.clear()
         for sensor in sensors:
-            self.append(Sensor(sensor.position, sensor.serial_number, sensor.failure))
+            self.append(Sensor(sensor.position, sensor.serial_number, sensor.failure,
+                               getattr(sensor, "failure_reason", None)))
 
     def clear(self):
-        self.log.clear()
+        self._by_position.clear()
+        self._by_serial_number.clear()
 
     def count(self):
-        return len(self.log)
+        return len(self._by_position)
 
     def get_failed_serial_numbers(self):
-        return [sensor.serial_number for sensor in self.log.values() if sensor.failure]
+        return [sensor.serial_number for sensor in self._by_position.values() if sensor.failure]
 
-    def get_sensor(self, serial_number: str):
-        return self._find_sensor_by_serial_number(serial_number)
+    def get_sensor(self, serial_number: str) -> Optional[Sensor]:
+        return self._by_serial_number.get(serial_number)
+
+    def get_sensor_at(self, position: int) -> Optional[Sensor]:
+        return self._by_position.get(position)
 
     def get_serial_numbers_as_tuple(self) -> tuple:
-        return tuple([sensor.serial_number for sensor in self.log.values()])
+        return tuple([sensor.serial_number for sensor in self._by_position.values()])
 
     def get_line_position(self, serial_number: str) -> int:
-        return self._find_sensor_by_serial_number(serial_number).position
+        return self._by_serial_number[serial_number].position
 
     def get_test_results(self) -> tuple:
-        return tuple([sensor.result for sensor in self.log.values()])
+        return tuple([sensor.result for sensor in self._by_position.values()])
 
     def set_test_time(self, serial_number: str, test_time_record: TestTimeRecord):
-        self._find_sensor_by_serial_number(serial_number).set_test_time(test_time_record)
+        self._by_serial_number[serial_number].set_test_time(test_time_record)
 
     def set_test_result(self, serial_number: str, result: str):
-        sensor = self._find_sensor_by_serial_number(serial_number)
+        sensor = self._by_serial_number[serial_number]
         sensor.result = result
         sensor.tested = True
 
-    def _find_sensor_by_serial_number(self, serial_number) -> Optional[Sensor]:
-        for sensor in self.log.values():
-            if sensor.serial_number == serial_number:
-                return sensor
-        return None
+    def _unindex(self, sensor: Sensor):
+        if self._by_serial_number.get(sensor.serial_number) is not sensor:
+            return
+
+        del self._by_serial_number[sensor.serial_number]
+        # another sensor may share the serial number, blanks do
+        if (other := next((s for s in self._by_position.values()
+                           if s is not sensor and s.serial_number == sensor.serial_number), None)) is not None:
+            self._by_serial_number[sensor.serial_number] = other
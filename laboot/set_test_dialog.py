@@ -0,0 +1,179 @@
+# set_test_dialog.py
+import math
+import time
+from typing import Iterable
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QGridLayout, QLabel, QProgressBar, QDialogButtonBox
+
+from laboot import constants, linkcapture
+from laboot.modemstatus import find_linked_serial_numbers
+from laboot.poller import BackgroundPoller
+from laboot.scheduler import get_scheduler
+from laboot.sensor import Sensor
+from laboot.signals import TestSignals
+from laboot.testengine import SetTestEngine, TestResult
+from laboot.utilities import http
+from laboot.utilities import time as utilities_time
+
+
+class SetTestDialog(QDialog):
+    """Runs the 5 Amp test for every untested sensor of a set at once."""
+
+    def __init__(self, parent, sensors: Iterable[Sensor], status_url: str = constants.URL_MODEM_STATUS):
+        super().__init__(parent)
+
+        self.status_url = status_url
+        self.signals = TestSignals()
+        self.scheduler = get_scheduler()
+        self.engine = SetTestEngine(sensors, clock=self.scheduler.clock)
+
+        self.dialog_layout = QVBoxLayout()
+        self.sensor_layout = QGridLayout()
+
+        font = QFont("Arial", 10)
+        self.time_labels = {}
+        self.time_bars = {}
+        self.result_labels = {}
+        for row, test in enumerate(self.engine):
+            lbl_serial_number = QLabel(test.serial_number)
+            lbl_serial_number.setFont(font)
+
+            pb_test_time = QProgressBar(self)
+            pb_test_time.setTextVisible(False)
+            pb_test_time.setFixedHeight(10)
+            pb_test_time.setRange(0, test.test_time)
+            pb_test_time.setValue(test.remaining_time)
+
+            lbl_time = QLabel(utilities_time.format_seconds_to_minutes_seconds(test.remaining_time))
+            lbl_time.setFont(font)
+
+            lbl_result = QLabel("Testing")
+            lbl_result.setFont(font)
+
+            self.sensor_layout.addWidget(lbl_serial_number, row, 0)
+            self.sensor_layout.addWidget(pb_test_time, row, 1)
+            self.sensor_layout.addWidget(lbl_time, row, 2)
+            self.sensor_layout.addWidget(lbl_result, row, 3)
+
+            self.time_bars[test.serial_number] = pb_test_time
+            self.time_labels[test.serial_number] = lbl_time
+            self.result_labels[test.serial_number] = lbl_result
+
+        # link interval visual status indicator
+        self.lbl_link_check = QLabel(
+            f"Link check in {utilities_time.format_seconds_to_minutes_seconds(self.engine.link_check_remaining)}")
+        self.lbl_link_check.setFont(font)
+
+        self.pb_link_check = QProgressBar(self)
+        self.pb_link_check.setTextVisible(False)
+        self.pb_link_check.setFixedHeight(10)
+        self.pb_link_check.setRange(0, math.ceil(self.engine.link_check_interval))
+        self.pb_link_check.setValue(self.engine.link_check_remaining)
+
+        buttons = QDialogButtonBox()
+        buttons.setStandardButtons(QDialogButtonBox.Cancel)
+        buttons.rejected.connect(self.reject)
+
+        self.dialog_layout.addLayout(self.sensor_layout)
+        self.dialog_layout.addWidget(self.lbl_link_check, alignment=Qt.AlignLeft)
+        self.dialog_layout.addWidget(self.pb_link_check)
+        self.dialog_layout.addWidget(buttons)
+
+        self.setLayout(self.dialog_layout)
+        self.setWindowTitle(f"Testing Set: {len(self.engine)} sensors")
+
+        # modem status is fetched off the GUI thread
+        self.poller = BackgroundPoller(self, fetch=http.get_client().iter_lines)
+        self.poller.signals.polled.connect(self._on_link_status)
+        self.poller.signals.failed.connect(self._on_link_check_failed)
+        self.poll_sent = None
+
+        # the shared scheduler wakes this dialog at its deadlines, and once a second to redraw the times
+        self.deadlines = [self.scheduler.call_at(test.deadline, self._on_test_deadline) for test in self.engine]
+        self.deadlines.append(self.scheduler.call_at(self.engine.link_check_deadline, self._on_link_check_deadline))
+        self._schedule_status_update()
+
+        self.resize(400, 50)
+
+    def done(self, status):
+        if status == QDialog.Rejected:
+            self.engine.cancel()
+
+        self._kill_timers()
+        self.poller.stop()
+        super().done(status)
+
+    def _on_test_deadline(self):
+        for result in self.engine.expire():
+            self._report(result)
+
+        self._update_status()
+        self._finish_if_done()
+
+    def _on_link_check_deadline(self):
+        if self.engine.is_finished():
+            return
+
+        serial_numbers = self.engine.serial_numbers_under_test
+        recorder = linkcapture.get_recorder()
+        if self.poller.poll(self.status_url,
+                            lambda lines: find_linked_serial_numbers(lines, serial_numbers, recorder)):
+            self.poll_sent = time.monotonic()
+        self.engine.start_link_check()
+        self.pb_link_check.setRange(0, math.ceil(self.engine.link_check_interval))
+        self.deadlines.append(self.scheduler.call_at(self.engine.link_check_deadline, self._on_link_check_deadline))
+
+        self._update_status()
+
+    def _schedule_status_update(self):
+        # redraw as the displayed seconds change, the times themselves come from the deadlines
+        self.status_update = self.scheduler.call_at(self.engine.next_second(), self._on_status_update)
+
+    def _on_status_update(self):
+        self._update_status()
+        self._schedule_status_update()
+
+    def _on_link_check_failed(self, url: str, message: str):
+        self.engine.record_poll(self._poll_time(), False)
+        self.lbl_link_check.setText("Link check failed")
+
+    def _poll_time(self) -> float:
+        return time.monotonic() - self.poll_sent if self.poll_sent else 0.0
+
+    def _on_link_status(self, url: str, linked_serial_numbers):
+        self.engine.record_poll(self._poll_time(), True)
+        for result in self.engine.record_link_status(linked_serial_numbers):
+            self._report(result)
+
+        self._finish_if_done()
+
+    def _finish_if_done(self):
+        if self.engine.is_finished() and self.isVisible():
+            self.signals.testFinished.emit()
+            self.done(QDialog.Accepted)
+
+    def _kill_timers(self):
+        for deadline in self.deadlines:
+            deadline.cancel()
+        self.status_update.cancel()
+
+    def _report(self, result: TestResult):
+        self.result_labels[result.serial_number].setText(result.result)
+
+        if result.result == "Pass":
+            self.signals.testPassed.emit(result)
+        else:
+            self.signals.testFailed.emit(result)
+
+    def _update_status(self):
+        for test in self.engine.active:
+            self.time_bars[test.serial_number].setValue(test.remaining_time)
+            self.time_labels[test.serial_number].setText(
+                utilities_time.format_seconds_to_minutes_seconds(test.remaining_time))
+
+        link_check_remaining = self.engine.link_check_remaining
+        self.lbl_link_check.setText(
+            f"Link check in {utilities_time.format_seconds_to_minutes_seconds(link_check_remaining)}")
+        self.pb_link_check.setValue(link_check_remaining)
@@ -6,7 +6,9 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import QFormLayout, QVBoxLayout, QLineEdit, QCheckBox, QDialogButtonBox, QDialog
 
 from laboot.signals import DefineSetSignals
-import laboot.spreadsheet as spreadsheet
+from laboot.utilities.lazy import lazy_import
+
+spreadsheet = lazy_import("laboot.spreadsheet")
 
 
 class SetDialog(QDialog):
@@ -54,7 +56,7 @@ class SetDialog(QDialog):
         # make sure carrot is in first sensor field
         self.line_edits[0].setFocus()
 
-    def _get_serial_numbers(self) -> Tuple[spreadsheet.SerialNumberInfo]:
+    def _get_serial_numbers(self) -> Tuple["spreadsheet.SerialNumberInfo"]:
         """Returns sensor serial numbers.
 
         Returns
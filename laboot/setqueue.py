@@ -0,0 +1,48 @@
+# setqueue.py
+import os
+import threading
+from collections import deque
+from typing import Iterable, Optional
+
+from laboot.orchestrator import StationSet
+from laboot.sensor import Sensor, SensorLog
+
+
+def make_station_set(path: str, serial_numbers: Iterable) -> StationSet:
+    """Creates a set from the SerialNumberInfo of a spreadsheet."""
+    sensors = SensorLog()
+    for info in serial_numbers:
+        sensors.append(Sensor(info.position, info.serial_number, info.failure, info.failure_reason))
+
+    return StationSet(os.path.basename(path), sensors, source=path)
+
+
+class SetQueue:
+    """Sets waiting to be tested, in the order they were imported."""
+
+    def __init__(self):
+        self._sets = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sets)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._sets))
+
+    def append(self, station_set: StationSet):
+        with self._lock:
+            self._sets.append(station_set)
+
+    def peek(self) -> Optional[StationSet]:
+        with self._lock:
+            return self._sets[0] if self._sets else None
+
+    def pop(self) -> Optional[StationSet]:
+        with self._lock:
+            return self._sets.popleft() if self._sets else None
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
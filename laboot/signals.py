@@ -14,11 +14,36 @@ class DropSignals(QObject):
     dropped_filename = pyqtSignal()
 
 
+class BatchImportSignals(QObject):
+    imported = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
 class CollectorSignals(QObject):
     offline = pyqtSignal(str)
+    unsupported = pyqtSignal(str)
     configured = pyqtSignal()
     finished = pyqtSignal()
 
 
 class DefineSetSignals(QObject):
     newSerialNumbers = pyqtSignal(tuple)
+
+
+class PollSignals(QObject):
+    polled = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+
+
+class StationSignals(QObject):
+    # a StationEvent from a collector's worker
+    event = pyqtSignal(object)
+    # the set and the Result of saving it
+    saved = pyqtSignal(object, object)
+    # the tests were stopped and every finished set saved
+    stopped = pyqtSignal()
+
+
+class SettingsSignals(QObject):
+    # the new settings and the keys that changed
+    changed = pyqtSignal(object, tuple)
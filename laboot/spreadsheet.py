@@ -1,22 +1,35 @@
 # spreadsheet.py
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from functools import partial
-from typing import Tuple, List
-
-from PyQt5.QtCore import QSettings
 from openpyxl import load_workbook
-from openpyxl.workbook.workbook import Workbook as openpyxlWorkbook, Worksheet as openpyxlWorksheet
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.workbook.workbook import Workbook as openpyxlWorkbook
 
 import laboot.constants as constants
+from laboot import metrics, rules, xlsxpatch
+from laboot.config.app.settings import get_settings
+from laboot.workbookcache import workbooks
 from laboot.utilities import utilities
 from laboot.utilities.returns import Result
 
 
+_DEFAULT_RULES_PATH = r"laboot/resources/data/failure_rules.json"
+
+# (path, rules) of the failure rules last loaded
+_rules = None
+
+# the workbook a save falls back to is cached and shared, one save edits it at a time
+_save_lock = threading.Lock()
+
+
 class SerialNumberInfo:
-    def __init__(self, serial_number: str, position: int, failure: bool):
+    def __init__(self, serial_number: str, position: int, failure: bool, failure_reason: str = None):
         self.serial_number = serial_number
         self.position = position
         self.failure = failure
+        self.failure_reason = failure_reason
 
     def __repr__(self):
         return f"SerialNumberResult('{self.serial_number}', {self.failure})"
@@ -61,21 +74,34 @@ def save_test_results(file_name: str, results: Tuple[str]) -> Result:
     results: tuple[str]
         For example, ("Pass", "Fail", "Pass", "Fail", "Pass", "Fail").
     """
-    settings = QSettings()
+    settings = get_settings()
+
+    save_locations = settings.result_locations
+    worksheet_name = settings.worksheet
 
-    save_locations = settings.value('spreadsheet/result_locations').split(' ')
+    # only the worksheet's part of the file is rewritten, everything else is copied as is
+    values = {location: str(result) for result, location in zip(results, save_locations)}
+    if patch_result := xlsxpatch.patch_cells(file_name, worksheet_name, values):
+        workbooks.evict(file_name)
+        return Result(True, results, message=patch_result.message)
+    logging.getLogger(__name__).info(f"Saving with openpyxl, the workbook can't be patched: {patch_result.message}")
 
-    if not (work_book_result := _get_workbook(file_name)):
-        return work_book_result
+    with _save_lock:
+        if not (work_book_result := workbooks.get(file_name, "workbook", lambda: _get_workbook(file_name))):
+            return work_book_result
 
-    if not (work_sheet_result := _get_worksheet(work_book_result(), settings.value("spreadsheet/worksheet"))):
-        return work_sheet_result
+        if not (work_sheet_result := _get_worksheet(work_book_result(), worksheet_name)):
+            return work_sheet_result
 
-    for result, location in zip(results, save_locations):
-        work_sheet_result()[location].value = str(result)
+        for result, location in zip(results, save_locations):
+            work_sheet_result()[location].value = str(result)
 
-    work_book_result().save(file_name)
-    work_book_result().close()
+        try:
+            work_book_result().save(file_name)
+        finally:
+            workbooks.evict(file_name)
+        # the workbook is what was just saved, saving the file again doesn't reload it
+        workbooks.put(file_name, "workbook", work_book_result)
 
     return Result(True, results, message="Data successfully saved.")
 
@@ -84,7 +110,9 @@ def _get_workbook(file_name: str) -> Result:
     try:
         # read_only=False, keep_vba=True prevents Excel from thinking the spreadsheet has been corrupted
         # data_only=True returns the result of a formula instead of the actual formula in the cell
-        work_book: openpyxlWorkbook = load_workbook(filename=file_name, read_only=False, keep_vba=True, data_only=True)
+        with metrics.time_block("workbook_load_seconds"):
+            work_book: openpyxlWorkbook = load_workbook(filename=file_name, read_only=False, keep_vba=True,
+                                                        data_only=True)
     except Exception as e:
         utilities.print_exception_info()
         return Result(False, None, message="Unable to load the workbook.", exception=e)
@@ -104,60 +132,108 @@ def _get_worksheet(work_book: openpyxlWorkbook, worksheet_name: str) -> Result:
     return Result(True, work_sheet)
 
 
-def _get_serial_numbers_from_worksheet(file_name: str) -> Result:
-    settings = QSettings()
+def _read_cells(file_name: str, worksheet_name: str, cells: Iterable[str]) -> Result:
+    """Reads the values of 'cells' from a single worksheet in one bounded pass.
 
-    if not (work_book_result := _get_workbook(file_name)):
-        return work_book_result
+    The workbook is opened read-only, so only the rows of the worksheet up to the
+    last wanted cell are parsed and nothing else is kept in memory.
+    """
+    try:
+        with metrics.time_block("workbook_load_seconds"):
+            work_book: openpyxlWorkbook = load_workbook(filename=file_name, read_only=True, data_only=True)
+    except Exception as e:
+        utilities.print_exception_info()
+        return Result(False, None, message="Unable to load the workbook.", exception=e)
 
-    if not (work_sheet_result := _get_worksheet(work_book_result(), settings.value("spreadsheet/worksheet"))):
-        return work_sheet_result
+    try:
+        if not (work_sheet_result := _get_worksheet(work_book, worksheet_name)):
+            return work_sheet_result
+
+        wanted = {coordinate_to_tuple(cell): cell for cell in cells}
+        min_row, max_row = min(row for row, _ in wanted), max(row for row, _ in wanted)
+        min_col, max_col = min(col for _, col in wanted), max(col for _, col in wanted)
+
+        values = dict.fromkeys(wanted.values())
+        rows = work_sheet_result().iter_rows(min_row=min_row, max_row=max_row,
+                                             min_col=min_col, max_col=max_col, values_only=True)
+        for row_index, row in enumerate(rows, start=min_row):
+            for col_index, value in enumerate(row, start=min_col):
+                if (cell := wanted.get((row_index, col_index))) is not None:
+                    values[cell] = value
+    except Exception as e:
+        utilities.print_exception_info()
+        return Result(False, None, message=f"Unable to read the worksheet '{worksheet_name}'.", exception=e)
+    finally:
+        work_book.close()
 
-    serial_locations = settings.value('spreadsheet/serial_locations').split(' ')
-    serial_numbers = []
-    for serial_location in serial_locations:
-        serial_numbers.append(str(work_sheet_result()[serial_location].value))
+    return Result(True, values)
 
-    serial_numbers = [serial_number if serial_number != 'None'
-                      else constants.BLANK_SERIAL_NUMBER for serial_number in serial_numbers]
-    serial_numbers_with_failures_identified: Tuple[SerialNumberInfo] = _identify_failures(work_sheet_result(),
-                                                                                          serial_numbers)
 
-    work_book_result().close()
+def get_set_cells(file_name: str) -> Result:
+    """Reads every cell import needs from a spreadsheet: serial numbers and prior test results.
 
-    return Result(True, serial_numbers_with_failures_identified)
+    Returns
+    -------
+        Result
+            the value is a cell -> value dict, see 'identify_sets'
+    """
+    settings = get_settings()
+
+    cells = list(dict.fromkeys([*settings.serial_locations, *rules.cells_used(_get_rules())]))
 
+    worksheet_name = settings.worksheet
+    return workbooks.get(file_name, ("cells", worksheet_name, tuple(cells)),
+                         lambda: _read_cells(file_name, worksheet_name, cells))
 
-def _get_cell_contents(work_sheet: openpyxlWorksheet, cell: str) -> str:
-    return str(work_sheet[cell].value)
 
+def identify_sets(sets: List[Dict[str, object]]) -> List[Tuple[SerialNumberInfo]]:
+    """Builds the serial number info of many spreadsheets, classifying all their sensors in one pass.
 
-def _is_failure(work_sheet: openpyxlWorksheet, position: int) -> bool:
-    gcc = partial(_get_cell_contents, work_sheet)
+    Parameters
+    ----------
+    sets: list
+        the cells of each spreadsheet as returned by 'get_set_cells'
+    """
+    serial_locations = get_settings().serial_locations
+    failures = rules.evaluate(_get_rules(), sets)
+
+    return [_make_serial_number_infos(cells, serial_locations, set_failures)
+            for cells, set_failures in zip(sets, failures)]
+
+
+def _get_serial_numbers_from_worksheet(file_name: str) -> Result:
+    if not (cells_result := get_set_cells(file_name)):
+        return cells_result
 
-    if gcc(constants.RAW_CONFIG_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.LOW_VOLTAGE_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.HIGH_VOLTAGE_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.PERSISTENCE_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.REPORTING_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.CALIBRATIONS_RESULTS[position]).lower() != 'pass' or \
-       gcc(constants.FAULT_CURRENT_RESULTS[position]).lower() != 'pass':
+    return Result(True, identify_sets([cells_result()])[0])
 
-        return True
 
-    if int(gcc(constants.RSSI_RESULTS[position])) <= -75 or \
-       abs(float(gcc(constants.TEMPERATURE_REFERENCE)) - float(gcc(constants.TEMPERATURE_RESULTS[position]))) > 15:
+def _get_rules() -> List[rules.Rule]:
+    global _rules
 
-        return True
+    path = get_settings().failure_rules or _DEFAULT_RULES_PATH
+    if _rules is None or _rules[0] != path:
+        try:
+            _rules = (path, rules.load_rules(path))
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            # the rules shipped with the application are the defaults, without them nothing can be checked
+            if path == _DEFAULT_RULES_PATH:
+                raise
+            logging.getLogger(__name__).warning(f"Unable to load failure rules from '{path}', "
+                                                f"using '{_DEFAULT_RULES_PATH}': {e}")
+            _rules = (path, rules.load_rules(_DEFAULT_RULES_PATH))
 
-    return False
+    return _rules[1]
 
 
-def _identify_failures(work_sheet: openpyxlWorksheet, serial_numbers) -> Tuple[SerialNumberInfo]:
+def _make_serial_number_infos(cells: Dict[str, object], serial_locations: List[str],
+                              failures: List[Optional[str]]) -> Tuple[SerialNumberInfo]:
     results: List[SerialNumberInfo] = []
 
-    for index, serial_number in enumerate(serial_numbers):
-        fails = True if _is_failure(work_sheet, index) else False
-        results.append(SerialNumberInfo(serial_number, index, fails))
+    for index, serial_location in enumerate(serial_locations):
+        serial_number = str(cells[serial_location])
+        serial_number = serial_number if serial_number != 'None' else constants.BLANK_SERIAL_NUMBER
+        failure_reason = failures[index] if index < len(failures) else None
+        results.append(SerialNumberInfo(serial_number, index, failure_reason is not None, failure_reason))
 
     return tuple(results)
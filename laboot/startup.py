@@ -0,0 +1,152 @@
+# startup.py
+"""Measures where the time goes between launching the app and the window appearing.
+
+Stages are marked as main() works through them. Started with PROFILE_STARTUP on the
+command line, every module imported is timed as well:
+
+    python cli.py PROFILE_STARTUP
+
+and once the window is up the slowest stages and modules are logged.
+"""
+import logging
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional, Tuple
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time it, putting the real loader back before the module runs."""
+
+    def __init__(self, loader, timer: "ImportTimer", name: str):
+        self.loader = loader
+        self.timer = timer
+        self.name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self.loader, attribute)
+
+    def create_module(self, spec):
+        # extension modules do most of their work here
+        with self.timer.timing(self.name):
+            return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = module.__spec__.loader = self.loader
+        with self.timer.timing(self.name):
+            self.loader.exec_module(module)
+
+
+class _Timing:
+    def __init__(self, timer: "ImportTimer", name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.timer._stack.append([self.name, time.perf_counter(), 0.0])
+
+    def __exit__(self, *exc_info):
+        name, started, children = self.timer._stack.pop()
+        cumulative = time.perf_counter() - started
+        own, total = self.timer.times.get(name, (0.0, 0.0))
+        self.timer.times[name] = (own + cumulative - children, total + cumulative)
+        if self.timer._stack:
+            self.timer._stack[-1][2] += cumulative
+
+
+class ImportTimer(MetaPathFinder):
+    """Times every module imported while it is installed, like python -X importtime.
+
+    'times' maps module name -> (seconds in the module itself, seconds including the
+    modules it imported). Imports on other threads are not timed.
+    """
+
+    def __init__(self):
+        self.times: Dict[str, Tuple[float, float]] = {}
+        self._stack = []
+        self._thread = None
+
+    def install(self) -> "ImportTimer":
+        self._thread = threading.get_ident()
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def timing(self, name: str) -> _Timing:
+        return _Timing(self, name)
+
+    def find_spec(self, name, path, target=None):
+        if threading.get_ident() != self._thread:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            if (spec := finder.find_spec(name, path, target)) is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, name)
+
+        return spec
+
+    def slowest(self, count: int) -> List[Tuple[str, float, float]]:
+        return sorted(((name, own, total) for name, (own, total) in self.times.items()),
+                      key=lambda t: t[1], reverse=True)[:count]
+
+
+class StartupProbe:
+    """Records how long each stage of starting up takes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.import_timer: Optional[ImportTimer] = None
+        self._last = self.started
+
+    def time_imports(self):
+        self.import_timer = ImportTimer().install()
+
+    def mark(self, stage: str):
+        """Ends 'stage', it took the time since the previous mark."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    @property
+    def elapsed(self) -> float:
+        return self._last - self.started
+
+    def report(self, modules: int = 15) -> List[str]:
+        lines = [f"Started in {self.elapsed * 1000:.0f} ms"]
+        lines.extend(f"  {stage:<24} {seconds * 1000:>8.1f} ms" for stage, seconds in self.stages)
+
+        if self.import_timer is not None:
+            self.import_timer.uninstall()
+            lines.append(f"Slowest of {len(self.import_timer.times)} imports, own / including imports:")
+            lines.extend(f"  {name:<40} {own * 1000:>8.1f} ms {total * 1000:>8.1f} ms"
+                         for name, own, total in self.import_timer.slowest(modules))
+
+        return lines
+
+    def log(self):
+        logger = logging.getLogger(__name__)
+        for line in self.report():
+            logger.info(line)
+
+
+_probe: Optional[StartupProbe] = None
+
+
+def get_probe() -> StartupProbe:
+    global _probe
+    if _probe is None:
+        _probe = StartupProbe()
+
+    return _probe
@@ -0,0 +1,209 @@
+# testengine.py
+import logging
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from typing import Callable, Iterable, List, Set, Tuple
+
+from laboot import constants
+from laboot.linkpolicy import LinkCheckPolicy
+from laboot.scheduler import DeadlineScheduler, real_seconds, seconds_left
+from laboot.sensor import Sensor
+
+TestResult = namedtuple("TestResult", "serial_number result")
+
+
+class SensorTest:
+    """The state of the 5 Amp test of a single sensor, it ends at 'deadline' on the engine's clock."""
+
+    def __init__(self, sensor: Sensor, started: float, clock: Callable[[], float]):
+        self.sensor = sensor
+        self.serial_number = sensor.serial_number
+        self.test_time = sensor.test_time_record.remaining_time
+        self.deadline = started + self.test_time
+        self.result = None
+
+        self._clock = clock
+        self._finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.result is not None
+
+    @property
+    def remaining_time(self) -> int:
+        return seconds_left(self.deadline, self._finished_at if self.finished else self._clock())
+
+    @property
+    def elapsed(self) -> float:
+        """Time on test, including any time before an interruption."""
+        return constants.TEST_TIME - (self.deadline - self._clock())
+
+    def finish(self, result: str):
+        self._finished_at = self._clock()
+        self.result = result
+
+
+class SetTestEngine:
+    """Runs the 5 Amp test for every untested sensor of a set at the same time.
+
+    All sensors under test share a single modem status poll per link check interval.
+    The engine does not fetch or wait for anything itself. Each test and the next
+    link check end at a deadline on 'clock', remaining times are computed from them
+    so they stay exact however late the caller gets round to 'expire'. It is told
+    which sensors are linked by 'record_link_status'.
+
+    The time between link checks comes from 'policy', by default an adaptive
+    LinkCheckPolicy based on 'link_check_time'.
+    """
+
+    def __init__(self, sensors: Iterable[Sensor], link_check_time: int = constants.LINK_CHECK_TIME,
+                 clock: Callable[[], float] = time.monotonic, policy: LinkCheckPolicy = None):
+        self.clock = clock
+        self.started = clock()
+        self.tests = {sensor.serial_number: SensorTest(sensor, self.started, clock) for sensor in sensors
+                      if not sensor.tested and sensor.serial_number != constants.BLANK_SERIAL_NUMBER}
+        self.link_check_time = link_check_time
+        self.policy = policy or LinkCheckPolicy(interval=link_check_time)
+        self.link_check_interval = self.policy.next_interval(test.elapsed for test in self.active)
+        self.link_check_deadline = self.started + self.link_check_interval
+
+    def __len__(self):
+        return len(self.tests)
+
+    def __iter__(self):
+        return iter(self.tests.values())
+
+    @property
+    def active(self) -> List[SensorTest]:
+        return [test for test in self.tests.values() if not test.finished]
+
+    @property
+    def serial_numbers_under_test(self) -> Tuple[str]:
+        return tuple([test.serial_number for test in self.active])
+
+    def is_finished(self) -> bool:
+        return not self.active
+
+    @property
+    def link_check_remaining(self) -> int:
+        return seconds_left(self.link_check_deadline, self.clock())
+
+    def is_time_to_check_links(self) -> bool:
+        return bool(self.active) and self.clock() >= self.link_check_deadline
+
+    def next_second(self) -> float:
+        """When the remaining times next drop by a second, test times are whole seconds from the start."""
+        return self.started + math.floor(self.clock() - self.started) + 1
+
+    def expire(self) -> List[TestResult]:
+        """Returns the results of sensors that have run out of time."""
+        now = self.clock()
+        return [self._finish(test, "Fail") for test in self.active if test.deadline <= now]
+
+    def start_link_check(self):
+        """Sets the next link check deadline, called when a modem status poll is sent."""
+        self.link_check_interval = self.policy.next_interval(test.elapsed for test in self.active)
+        self.link_check_deadline = self.clock() + self.link_check_interval
+
+    def record_poll(self, response_time: float, succeeded: bool):
+        """Tells the policy how the last modem status poll went."""
+        self.policy.record_poll(response_time, succeeded)
+
+    def record_link_status(self, linked_serial_numbers: Set[str]) -> List[TestResult]:
+        """Returns the results of sensors found linked."""
+        results = []
+        for test in self.active:
+            if test.serial_number in linked_serial_numbers:
+                self.policy.record_link(test.elapsed)
+                results.append(self._finish(test, "Pass"))
+
+        return results
+
+    def cancel(self, when: datetime = None):
+        """Records the remaining test time of unfinished sensors so their tests can be resumed."""
+        when = when or datetime.now()
+        for test in self.active:
+            test.sensor.test_time_record.set_test_interruption_time(test.remaining_time, when)
+
+    @staticmethod
+    def _finish(test: SensorTest, result: str) -> TestResult:
+        test.finish(result)
+        return TestResult(test.serial_number, result)
+
+
+def run(engine: SetTestEngine, find_linked: Callable[[Tuple[str]], Set[str]],
+        on_result: Callable[[TestResult], None] = None, stop: threading.Event = None) -> List[TestResult]:
+    """Runs 'engine' to completion on the calling thread, for use away from the Qt event loop.
+
+    The thread sleeps until the next test or link check deadline on the engine's clock.
+
+    Parameters
+    ----------
+    engine: SetTestEngine
+        the set under test
+
+    find_linked: Callable
+        called with the serial numbers still under test once per link check interval,
+        returns the ones the collector reports linked
+
+    on_result: Callable
+        called with each TestResult as soon as it is known
+
+    stop: threading.Event
+        when set, the remaining tests are cancelled and their remaining time recorded
+
+    Returns
+    -------
+        list
+            the TestResult of every sensor that finished
+    """
+    logger = logging.getLogger(__name__)
+    stop = stop or threading.Event()
+    results = []
+
+    def report(result: TestResult):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    scheduler = DeadlineScheduler(engine.clock)
+
+    def expire():
+        for result in engine.expire():
+            report(result)
+
+    def check_links():
+        if engine.is_finished():
+            return
+
+        sent = time.monotonic()
+        try:
+            linked = find_linked(engine.serial_numbers_under_test)
+            engine.record_poll(time.monotonic() - sent, True)
+        except Exception as e:
+            logger.warning(f"Link check failed: {e}")
+            engine.record_poll(time.monotonic() - sent, False)
+            linked = set()
+
+        # the poll is over, so its outcome can shape the wait before the next one
+        engine.start_link_check()
+        scheduler.call_at(engine.link_check_deadline, check_links)
+
+        for result in engine.record_link_status(linked):
+            report(result)
+
+    for test in engine.active:
+        scheduler.call_at(test.deadline, expire)
+    scheduler.call_at(engine.link_check_deadline, check_links)
+
+    while not engine.is_finished():
+        if stop.wait(real_seconds(engine.clock, scheduler.time_until_next())):
+            engine.cancel()
+            break
+
+        scheduler.run_due()
+
+    return results
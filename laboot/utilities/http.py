@@ -0,0 +1,144 @@
+# utilities/http.py
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+from laboot import constants, metrics
+from laboot.config.app.settings import get_settings
+from laboot.utilities.lazy import lazy_import
+
+# requests is slow to import and not needed until the first collector is contacted
+requests = lazy_import("requests")
+
+# the collector's web server is slow to accept connections, but a connect should never take long
+_CONNECT_TIMEOUT = 3.05
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _request_timeout() -> float:
+    return get_settings().request_timeout or constants.REQUEST_TIMEOUT
+
+
+class CollectorClient:
+    """Pooled HTTP client for the collector's web pages.
+
+    Connections are kept alive between polls, compressed responses are accepted and pages
+    are requested conditionally (ETag/If-Modified-Since) when the collector supplies validators.
+    """
+
+    def __init__(self, timeout: float = None, pool_size: int = 4):
+        self.timeout = (_CONNECT_TIMEOUT, timeout or _request_timeout())
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+
+        # url -> (etag, last modified, page text)
+        self._pages: Dict[str, Tuple[Optional[str], Optional[str], str]] = {}
+        self._lock = threading.Lock()
+
+    def get_text(self, url: str) -> str:
+        """Returns the text of the page at 'url', reusing the last copy if it has not changed."""
+        cached, headers = self._conditional_headers(url)
+
+        try:
+            with metrics.time_block("collector_get_seconds"):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+            if response.status_code == 304 and cached:
+                metrics.inc("collector_not_modified_total")
+                return cached[2]
+
+            response.raise_for_status()
+        except requests.RequestException:
+            # timeouts and refused connections as well as error statuses
+            metrics.inc("collector_errors_total")
+            raise
+
+        # skip character set detection, it is slow on large pages and the collector only serves ascii
+        response.encoding = response.encoding or "ISO-8859-1"
+        text = response.text
+
+        self._remember(url, response, text)
+
+        return text
+
+    def iter_lines(self, url: str) -> Iterator[str]:
+        """Streams the page at 'url' line by line.
+
+        The caller may stop early, the rest of the body is then drained without decoding
+        so the connection can go back to the pool. The fetch is timed from the request
+        until the body has been read, the caller's handling of each line included.
+        """
+        cached, headers = self._conditional_headers(url)
+
+        try:
+            with metrics.time_block("collector_get_seconds"), \
+                    self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    metrics.inc("collector_not_modified_total")
+                    yield from cached[2].split('\n')
+                    return
+
+                response.raise_for_status()
+                response.encoding = response.encoding or "ISO-8859-1"
+
+                lines = []
+                complete = False
+                try:
+                    for line in response.iter_lines(decode_unicode=True):
+                        lines.append(line)
+                        yield line
+                    complete = True
+                finally:
+                    if not complete:
+                        for _ in response.raw.stream(8192, decode_content=False):
+                            pass
+
+                self._remember(url, response, '\n'.join(lines))
+        except requests.RequestException:
+            metrics.inc("collector_errors_total")
+            raise
+
+    def post(self, url: str, data) -> "requests.Response":
+        with metrics.time_block("collector_post_seconds"):
+            return self.session.post(url, data=data, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+    def _conditional_headers(self, url: str):
+        with self._lock:
+            cached = self._pages.get(url)
+
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        return cached, headers
+
+    def _remember(self, url: str, response: "requests.Response", text: str):
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        with self._lock:
+            if etag or last_modified:
+                self._pages[url] = (etag, last_modified, text)
+            else:
+                self._pages.pop(url, None)
+
+
+def get_client() -> CollectorClient:
+    """Returns the client shared by everything that talks to the collector."""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = CollectorClient()
+
+        return _client
@@ -0,0 +1,60 @@
+# utilities/lazy.py
+import importlib
+import logging
+import threading
+import time
+from typing import Iterable
+
+
+class LazyModule:
+    """Stands in for a module and imports it the first time one of its attributes is used.
+
+    Modules such as openpyxl take longer to import than the rest of the window takes
+    to appear, and most of them aren't needed until the operator drops a spreadsheet.
+    Importing is thread safe, a module being preloaded in the background is simply
+    waited on.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}', {state}>"
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            logging.getLogger(__name__).debug(
+                f"Imported {self._name} in {(time.perf_counter() - started) * 1000:.0f} ms.")
+
+        return self._module
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def preload(modules: Iterable[LazyModule]) -> threading.Thread:
+    """Imports 'modules' on a background thread, so they are ready by the time they're used."""
+    def load_all():
+        for module in modules:
+            try:
+                module.load()
+            except ImportError as e:
+                # whoever uses the module gets the error, with a traceback, when they do
+                logging.getLogger(__name__).warning(f"Unable to preload {module!r}: {e}")
+
+    thread = threading.Thread(target=load_all, name="preload", daemon=True)
+    thread.start()
+
+    return thread
@@ -1,5 +1,11 @@
 # utilities/sound.py
 
 
+def load_sound(file_name: str):
+    # QtMultimedia is imported on first use, loading its plugins slows starting up
+    from PyQt5.QtMultimedia import QSound
+    return QSound(file_name)
+
+
 def play_sound(snd):
     snd.play()
@@ -9,6 +9,8 @@ def format_seconds_to_minutes_seconds(seconds):
 
 
 class TestTimeRecord:
+    __slots__ = ("test_time", "interruption_time")
+
     def __init__(self, test_time: int):
         self.test_time = test_time
         self.interruption_time = None
@@ -16,7 +18,7 @@ class TestTimeRecord:
     @property
     def remaining_time(self):
         if self.interruption_time:
-            if (test_time := self.test_time - (datetime.now() - self.interruption_time).seconds) <= 0:
+            if (test_time := self.test_time - int((datetime.now() - self.interruption_time).total_seconds())) <= 0:
                 return 0
             return test_time
 
@@ -0,0 +1,86 @@
+# workbookcache.py
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WorkbookCache:
+    """A small LRU cache of what has been parsed out of workbooks.
+
+    Entries are keyed by path and a kind chosen by the caller, for example the cells
+    read at import, serial numbers and failure rule inputs together, or the workbook
+    saving falls back to when it can't be patched. Each entry remembers the
+    file's modification time and size, so an entry is reloaded as soon as the file
+    has been changed on disk, by this application or anybody else.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path: str, kind: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for 'path' and 'kind', calling 'loader' on a miss.
+
+        Falsy values, such as a failed Result, are returned but never cached.
+        """
+        path = os.path.abspath(path)
+        signature = _signature(path)
+
+        with self._lock:
+            entry = self._entries.get((path, kind))
+            if entry is not None and signature is not None and entry[0] == signature:
+                self._entries.move_to_end((path, kind))
+                return entry[1]
+
+        value = loader()
+
+        with self._lock:
+            if value and signature is not None and signature == _signature(path):
+                self._entries[(path, kind)] = (signature, value)
+                self._entries.move_to_end((path, kind))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop((path, kind), None)
+
+        return value
+
+    def put(self, path: str, kind: Hashable, value: Any):
+        """Caches 'value' for the file as it is now, for a value that was just written to it."""
+        path = os.path.abspath(path)
+        if (signature := _signature(path)) is None:
+            return
+
+        with self._lock:
+            self._entries[(path, kind)] = (signature, value)
+            self._entries.move_to_end((path, kind))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, path: str):
+        """Drops every entry of 'path'."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+workbooks = WorkbookCache()
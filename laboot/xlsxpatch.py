@@ -0,0 +1,295 @@
+# xlsxpatch.py
+import os
+import posixpath
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterable, List, Tuple
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter, range_boundaries
+
+from laboot import metrics
+from laboot.utilities.returns import Result
+
+_attribute_pattern = re.compile(r'([\w:]+)\s*=\s*"([^"]*)"')
+_sheet_pattern = re.compile(r"<sheet\b[^>]*>")
+_relationship_pattern = re.compile(r"<Relationship\b[^>]*>")
+_sheet_data_pattern = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_row_pattern = re.compile(r'<row\b[^>]*\br="(\d+)"[^>]*?(?:/>|>(.*?)</row>)', re.S)
+_cell_pattern = re.compile(r'<c\b[^>]*\br="([A-Z]+)(\d+)"[^>]*?(?:/>|>(.*?)</c>)', re.S)
+_style_pattern = re.compile(r'\bs="(\d+)"')
+_spans_pattern = re.compile(r'\bspans="([^"]*)"')
+_dimension_pattern = re.compile(r'(<dimension\b[^>]*\bref=")([^"]*)(")')
+
+# zip records, see the APPNOTE of the zip format
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ENCRYPTED = 0x1
+_DATA_DESCRIPTOR = 0x8
+_UTF8_NAME = 0x800
+_ZIP64_LIMIT = 0xFFFFFFFF
+
+
+class UnsupportedWorkbook(Exception):
+    """The workbook can't be patched in place, it has to be saved the long way."""
+
+
+@metrics.timed("workbook_patch_seconds")
+def patch_cells(file_name: str, worksheet_name: str, values: Dict[str, str]) -> Result:
+    """Writes 'values' into the cells of a worksheet without re-serializing the workbook.
+
+    Only the worksheet's XML part is changed, every other member of the xlsx/xlsm
+    zip, VBA project included, is copied still compressed, so the time taken barely
+    grows with the size of the workbook. Cells holding formulas are not patched.
+
+    Parameters
+    ----------
+    file_name: str
+        path to spreadsheet
+
+    worksheet_name: str
+        the worksheet to write to
+
+    values: dict
+        cell -> text, for example {"D5": "Pass", "E5": "Fail"}
+    """
+    try:
+        with zipfile.ZipFile(file_name) as work_book:
+            sheet_path = _find_sheet_path(work_book, worksheet_name)
+            sheet_xml = work_book.read(sheet_path).decode("utf-8")
+            patched_xml = _patch_sheet_xml(sheet_xml, values)
+            temporary_name = _write_copy(work_book, file_name, sheet_path, patched_xml.encode("utf-8"))
+
+        # the original has to be closed before it can be replaced on Windows
+        _replace(temporary_name, file_name)
+    except UnsupportedWorkbook as e:
+        return Result(False, None, message=str(e), exception=e)
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        return Result(False, None, message=f"Unable to update the workbook: {e}", exception=e)
+
+    return Result(True, values, message="Data successfully saved.")
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    return {name: unescape(value, {"&quot;": '"'}) for name, value in _attribute_pattern.findall(tag)}
+
+
+def _relationship_id(attributes: Dict[str, str]) -> str:
+    if (relationship_id := next((v for name, v in attributes.items() if name.endswith(":id")), None)) is None:
+        raise UnsupportedWorkbook("The worksheet entry has no relationship id.")
+
+    return relationship_id
+
+
+def _find_sheet_path(work_book: zipfile.ZipFile, worksheet_name: str) -> str:
+    workbook_xml = work_book.read("xl/workbook.xml").decode("utf-8")
+
+    sheets = [_attributes(tag) for tag in _sheet_pattern.findall(workbook_xml)]
+    if not (sheet := next((sheet for sheet in sheets if sheet.get("name") == worksheet_name), None)):
+        raise UnsupportedWorkbook(f"Unable to locate worksheet '{worksheet_name}' in the spreadsheet.")
+
+    relationships_xml = work_book.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    relationships = [_attributes(tag) for tag in _relationship_pattern.findall(relationships_xml)]
+    relationship_id = _relationship_id(sheet)
+    if not (relationship := next((r for r in relationships if r.get("Id") == relationship_id), None)):
+        raise UnsupportedWorkbook(f"Worksheet '{worksheet_name}' has no part in the workbook.")
+
+    target = relationship["Target"]
+    return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+
+def _inline_cell(reference: str, existing: str, text: str) -> str:
+    style = f' s="{match[1]}"' if existing and (match := _style_pattern.search(existing.split(">", 1)[0])) else ""
+    return f'<c r="{reference}"{style} t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+
+
+def _patch_row(row_xml: str, row: int, cells: Dict[int, Tuple[str, str]]) -> str:
+    """Replaces or inserts 'cells' (column -> (reference, text)) in a row, keeping column order."""
+    head, _, body = row_xml.partition(">")
+    if head.endswith("/"):
+        head, body = head[:-1], "</row>"
+
+    body_end = body.rfind("</row>")
+    content, tail = body[:body_end], body[body_end:]
+
+    pieces = []
+    pending = dict(sorted(cells.items()))
+    for match in _cell_pattern.finditer(content):
+        column = coordinate_to_tuple(f"{match[1]}{match[2]}")[1]
+
+        for new_column in [c for c in pending if c < column]:
+            pieces.append(_inline_cell(pending[new_column][0], "", pending.pop(new_column)[1]))
+
+        if column in pending:
+            if "<f" in (match[3] or ""):
+                raise UnsupportedWorkbook(f"Cell {match[1]}{match[2]} holds a formula.")
+            reference, text = pending.pop(column)
+            pieces.append(_inline_cell(reference, match[0], text))
+        else:
+            pieces.append(match[0])
+
+    for reference, text in pending.values():
+        pieces.append(_inline_cell(reference, "", text))
+
+    if _cell_pattern.sub("", content).strip():
+        raise UnsupportedWorkbook(f"Row {row} has content the patcher does not understand.")
+
+    # spans is a hint of the row's first and last columns, it has to cover a cell added outside them
+    if spans := _spans_pattern.search(head):
+        bounds = [int(bound) for bound in re.findall(r"\d+", spans[1])]
+        if bounds and (min(cells) < min(bounds) or max(cells) > max(bounds)):
+            head = f'{head[:spans.start()]}spans="{min(*bounds, *cells)}:{max(*bounds, *cells)}"{head[spans.end():]}'
+
+    return f"{head}>{''.join(pieces)}{tail}"
+
+
+def _patch_sheet_xml(sheet_xml: str, values: Dict[str, str]) -> str:
+    if not (sheet_data := _sheet_data_pattern.search(sheet_xml)):
+        raise UnsupportedWorkbook("The worksheet has no cell data.")
+
+    # row -> column -> (reference, text)
+    by_row: Dict[int, Dict[int, Tuple[str, str]]] = {}
+    for reference, text in values.items():
+        row, column = coordinate_to_tuple(reference)
+        by_row.setdefault(row, {})[column] = (reference, str(text))
+
+    rows_xml = sheet_data[1] or ""
+    pieces = []
+    for match in _row_pattern.finditer(rows_xml):
+        row = int(match[1])
+
+        for new_row in [r for r in sorted(by_row) if r < row]:
+            pieces.append(_patch_row(f'<row r="{new_row}"/>', new_row, by_row.pop(new_row)))
+
+        pieces.append(_patch_row(match[0], row, by_row.pop(row)) if row in by_row else match[0])
+
+    for new_row in sorted(by_row):
+        pieces.append(_patch_row(f'<row r="{new_row}"/>', new_row, by_row[new_row]))
+
+    if _row_pattern.sub("", rows_xml).strip():
+        raise UnsupportedWorkbook("The worksheet has cell data the patcher does not understand.")
+
+    opening_tag = "<sheetData>" if sheet_data[1] is None else sheet_data[0].split(">", 1)[0] + ">"
+    patched = f"{opening_tag}{''.join(pieces)}</sheetData>"
+
+    sheet_xml = sheet_xml[:sheet_data.start()] + patched + sheet_xml[sheet_data.end():]
+    return _dimension_pattern.sub(lambda match: match[1] + _widen(match[2], values) + match[3], sheet_xml, count=1)
+
+
+def _widen(reference: str, cells: Iterable[str]) -> str:
+    """The range 'reference' grown to hold 'cells', the worksheet's dimension covers every used cell."""
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(reference)
+    except (TypeError, ValueError):
+        raise UnsupportedWorkbook(f"The worksheet's dimension '{reference}' is not a range.")
+
+    coordinates = [coordinate_to_tuple(cell) for cell in cells]
+    rows = [min_row, max_row, *(row for row, _ in coordinates)]
+    columns = [min_col, max_col, *(column for _, column in coordinates)]
+
+    widened = f"{get_column_letter(min(columns))}{min(rows)}:{get_column_letter(max(columns))}{max(rows)}"
+    return reference if range_boundaries(widened) == range_boundaries(reference) else widened
+
+
+def _write_copy(work_book: zipfile.ZipFile, file_name: str, sheet_path: str, sheet_xml: bytes) -> str:
+    """Writes a copy of 'work_book' with a new worksheet part next to 'file_name'.
+
+    The zip is written by hand: the other members' compressed bytes are copied
+    without being inflated and deflated again, only the worksheet is compressed.
+    """
+    directory = os.path.dirname(os.path.abspath(file_name))
+    handle, temporary_name = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    os.close(handle)
+
+    try:
+        with open(file_name, "rb") as source, open(temporary_name, "wb") as patched:
+            central_directory = []
+            for member in work_book.infolist():
+                if member.flag_bits & _ENCRYPTED:
+                    raise UnsupportedWorkbook(f"'{member.filename}' is encrypted.")
+
+                if member.filename == sheet_path:
+                    data = _compress(sheet_xml, member.compress_type)
+                    crc, file_size = zlib.crc32(sheet_xml), len(sheet_xml)
+                else:
+                    data = _read_compressed(source, member)
+                    crc, file_size = member.CRC, member.file_size
+
+                central_directory.append(_write_member(patched, member, crc, file_size, data))
+
+            _write_central_directory(patched, central_directory, work_book.comment)
+    except BaseException:
+        os.remove(temporary_name)
+        raise
+
+    return temporary_name
+
+
+def _compress(data: bytes, compress_type: int) -> bytes:
+    if compress_type == zipfile.ZIP_STORED:
+        return data
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+
+    raise UnsupportedWorkbook(f"The worksheet is compressed with method {compress_type}.")
+
+
+def _read_compressed(source: BinaryIO, member: zipfile.ZipInfo) -> bytes:
+    source.seek(member.header_offset)
+    signature, *_, name_length, extra_length = _LOCAL_HEADER.unpack(source.read(_LOCAL_HEADER.size))
+    if signature != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"'{member.filename}' has no local header.")
+
+    source.seek(name_length + extra_length, os.SEEK_CUR)
+    return source.read(member.compress_size)
+
+
+def _write_member(patched: BinaryIO, member: zipfile.ZipInfo, crc: int, file_size: int, data: bytes) -> bytes:
+    """Writes a member's local header and data, returns its central directory header."""
+    offset = patched.tell()
+    if max(offset, file_size, len(data)) >= _ZIP64_LIMIT:
+        raise UnsupportedWorkbook("The workbook is too large to be patched.")
+
+    # sizes and CRC go in the local header, so no data descriptor follows the data
+    flags = member.flag_bits & ~_DATA_DESCRIPTOR
+    name = member.orig_filename.encode("utf-8" if flags & _UTF8_NAME else "cp437")
+    year, month, day, hour, minute, second = member.date_time
+    time, date = hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day
+
+    patched.write(_LOCAL_HEADER.pack(b"PK\x03\x04", member.extract_version, flags, member.compress_type, time, date,
+                                     crc, len(data), file_size, len(name), len(member.extra)))
+    patched.write(name + member.extra)
+    patched.write(data)
+
+    central_header = _CENTRAL_HEADER.pack(b"PK\x01\x02", member.create_system << 8 | member.create_version,
+                                          member.extract_version, flags, member.compress_type, time, date, crc,
+                                          len(data), file_size, len(name), len(member.extra), len(member.comment), 0,
+                                          member.internal_attr, member.external_attr, offset)
+    return central_header + name + member.extra + member.comment
+
+
+def _write_central_directory(patched: BinaryIO, central_directory: List[bytes], comment: bytes):
+    offset = patched.tell()
+    patched.writelines(central_directory)
+    size = patched.tell() - offset
+    if len(central_directory) >= 0xFFFF or offset + size >= _ZIP64_LIMIT:
+        raise UnsupportedWorkbook("The workbook is too large to be patched.")
+
+    patched.write(_END_RECORD.pack(b"PK\x05\x06", 0, 0, len(central_directory), len(central_directory), size, offset,
+                                   len(comment)) + comment)
+
+
+def _replace(temporary_name: str, file_name: str):
+    """Swaps the patched copy in atomically, keeping the permissions of the original."""
+    try:
+        shutil.copymode(file_name, temporary_name)
+        os.replace(temporary_name, file_name)
+    except BaseException:
+        os.remove(temporary_name)
+        raise